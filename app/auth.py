@@ -4,14 +4,53 @@ from blacksheep.exceptions import Forbidden
 from app.settings import Settings
 from guardpost import AuthenticationHandler, AuthorizationStrategy, Policy
 from guardpost.common import AuthenticatedRequirement
+from guardpost.authorization import AuthorizationContext, Requirement
 
+from user.schema import Principal
 from user.tables import User
+from msgspec import Struct
+from utils.codecs import MSGPACK_ENCODER, msgpack_decoder
+from utils.db_replicas import get_replica_router
 from utils.identity import UserIdentity
+from utils.identity_cache import get_identity_cache
 from utils.logging import get_logger
-from utils.token import JWTService
+from utils.metrics import register_metrics
+from utils.password import get_password_service
+from utils.rejections import FailureCounter, NegativeCache
+from utils.singleflight import SingleFlight
+from utils.token import (
+    JWTService,
+    TokenPayload,
+    UnverifiedClaims,
+    issued_at_ms,
+    peek_claims,
+)
 from time import time
 
-from cacheout import Cache
+
+class SharedIdentity(Struct, gc=False):
+    """
+    共享缓存层中保存的内容: 已验证的 token 声明与精简用户信息
+    """
+
+    payload: TokenPayload
+    principal: Principal
+
+
+SHARED_DECODER = msgpack_decoder(SharedIdentity)
+
+
+class SuperuserRequirement(Requirement):
+    """
+    仅允许超级管理员访问
+    """
+
+    def handle(self, context: AuthorizationContext) -> None:
+        identity = context.identity
+        if isinstance(identity, UserIdentity):
+            account = identity.account
+            if account is not None and account.superuser:
+                context.succeed(self)
 
 
 def configure_authentication(app: Application, settings: Settings) -> None:
@@ -19,18 +58,29 @@ def configure_authentication(app: Application, settings: Settings) -> None:
     Configure authentication as desired. For reference:
     https://www.neoteroi.dev/blacksheep/authentication/
     """
-    app.use_authentication().add(JWTAuthHandler(settings=settings))
+    auth_handler = JWTAuthHandler(settings=settings)
+    app.use_authentication().add(auth_handler)
     app.use_authorization(
         strategy=AuthorizationStrategy(
             container=app.services,
             default_policy=Policy("default"),
-        ).add(
+        )
+        .add(
             Policy(
                 "authenticated",
                 AuthenticatedRequirement(),
             )
-        ),
+        )
+        .add(Policy("superuser", AuthenticatedRequirement(), SuperuserRequirement())),
     )
+    register_metrics("password_hasher", get_password_service().stats)
+    register_metrics("auth_failures", lambda: dict(auth_handler.failures.totals))
+
+    async def shutdown_auth_services(application: Application) -> None:
+        get_password_service().shutdown()
+        await get_identity_cache().close()
+
+    app.on_stop += shutdown_auth_services
 
 
 class JWTAuthHandler(AuthenticationHandler):
@@ -42,26 +92,93 @@ class JWTAuthHandler(AuthenticationHandler):
         self.logger = get_logger("jwt_auth")
         self.auth_mode = auth_mode
         self.jwt_service = JWTService()
-        self.ttl_cache = Cache(maxsize=256, ttl=3600)  # 1 hour
+        self.cache = get_identity_cache()
+        self.inflight: SingleFlight[UserIdentity] = SingleFlight()
+        self.rejected = NegativeCache(
+            maxsize=settings.auth_cache.negative_maxsize,
+            ttl=settings.auth_cache.negative_ttl,
+        )
+        self.failures = FailureCounter(
+            interval=settings.auth_cache.failure_log_interval
+        )
 
     async def decode_token(self, token: str) -> t.Optional[UserIdentity]:
         """
         Decode the JWT token and return the user identity.
         """
-        if not self.ttl_cache.get(token):
+        claims = peek_claims(token)
+        if claims is None:
+            raise ValueError("Malformed token.")
+        key = claims.jti.hex
+        digest = self.cache.digest(token)
+
+        identity = self.cache.get_local(key, digest)
+        if identity is not None:
+            return identity
+        if reason := self.rejected.get(digest):
+            raise ValueError(reason)
+
+        # 同一 token 的并发请求只进行一次签名验证与数据库查询
+        return await self.inflight.do(
+            (key, digest), lambda: self._resolve(token, claims, key, digest)
+        )
+
+    async def _resolve(
+        self, token: str, claims: UnverifiedClaims, key: str, digest: bytes
+    ) -> UserIdentity:
+        shared, revoked_at = await self.cache.lookup_shared(key, claims.sub, digest)
+        principal: t.Optional[Principal] = None
+        if shared is not None:
+            cached = SHARED_DECODER.decode(shared)
+            payload = cached.payload
+            if payload.exp <= time():
+                raise ValueError("Token has expired.")
+            # 共享层的吊销标记可能已被覆盖, 用户信息超过 local_ttl 后重新读取数据库
+            if self.cache.is_fresh(cached.principal.version):
+                principal = cached.principal
+        else:
             payload = self.jwt_service.verify_jwt(token=token)
-            user = await User.objects().get(User.id == payload.sub)
-            if not user:
-                raise Forbidden("User not found.")
-            self.ttl_cache.set(
-                key=token,
-                value=UserIdentity(
-                    claims={"account": user}, authentication_mode=self.auth_mode
-                ),
-                ttl=(ttl if (ttl := payload.exp - time()) < 3600 else 3600),
+
+        # 已知被吊销时不再查询数据库
+        if self.cache.is_revoked(payload.sub, issued_at_ms(payload), revoked_at):
+            raise Forbidden("Token has been revoked.")
+        reloaded = principal is None
+        if principal is None:
+            principal = await User.load_principal(
+                payload.sub, node=get_replica_router().read_node(payload.sub)
             )
+            if not principal:
+                raise Forbidden("User not found.")
+
+        # 数据库中的吊销时间对所有 worker 生效, 不依赖共享缓存层
+        if self.cache.is_revoked(
+            payload.sub,
+            issued_at_ms(payload),
+            max(revoked_at, principal.revoked_at),
+        ):
+            raise Forbidden("Token has been revoked.")
 
-        return self.ttl_cache.get(token)
+        if not principal.active:
+            raise Forbidden("User is inactive.")
+        identity = UserIdentity(
+            claims={"account": principal}, authentication_mode=self.auth_mode
+        )
+        await self.cache.set(
+            key,
+            user_id=payload.sub,
+            digest=digest,
+            expires_at=payload.exp,
+            identity=identity,
+            shared_value=(
+                MSGPACK_ENCODER.encode(
+                    SharedIdentity(payload=payload, principal=principal)
+                )
+                if reloaded
+                else None
+            ),
+            loaded_at=principal.version,
+        )
+        return identity
 
     async def authenticate(  # type: ignore
         self,
@@ -78,9 +195,16 @@ class JWTAuthHandler(AuthenticationHandler):
             )
             context.user = UserIdentity({})
             return None
-        token = authorization_value[7:].decode()
+        token = authorization_value[7:].decode(errors="replace")
         try:
             return await self.decode_token(token=token)
+        except (ValueError, Forbidden) as e:
+            # token 本身无效: 计入负缓存, 只做汇总统计, 不逐条记录日志
+            reason = str(e)
+            self.rejected.add(self.cache.digest(token), reason)
+            self.failures.record(reason)
+            context.user = UserIdentity({})
+            return None
         except Exception as e:
             self.logger.error(f"Token decoding failed: {e}")
             context.user = UserIdentity({})
@@ -0,0 +1,21 @@
+from blacksheep import Application
+
+from app.settings import Settings
+from utils.compression import CompressionMiddleware, get_precompressed_cache
+from utils.metrics import register_metrics
+
+
+def configure_compression(app: Application, settings: Settings) -> None:
+    """
+    Configure negotiated response compression.
+    """
+    if not settings.compression.enabled:
+        return
+    middleware = CompressionMiddleware(settings.compression, get_precompressed_cache())
+    app.middlewares.append(middleware)
+    register_metrics("compression", middleware.stats)
+
+    async def shutdown_compression(application: Application) -> None:
+        middleware.shutdown()
+
+    app.on_stop += shutdown_compression
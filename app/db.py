@@ -1,31 +1,58 @@
 from blacksheep import Application
 from piccolo.engine import engine_finder
-from utils.db_check import check_database
+from user.tables import User
+from utils.bootstrap import BOOTSTRAP_LATCH
+from utils.db_check import MigrationError, check_database
+from utils.db_pool import InstrumentedPostgresEngine
+from utils.db_replicas import get_replica_router
 from utils.logging import get_logger
+from utils.metrics import register_metrics
+from utils.timing import PhaseTimer
 
 logger = get_logger(__name__)
 
 
 def configure_db(app: Application) -> None:
     async def open_database_connection_pool(application: Application) -> None:
+        timer = PhaseTimer()
         try:
             engine = engine_finder()
             if engine is None:
                 raise Exception("No engine found")
-            await engine.start_connection_pool()
+            with timer.phase("pool"):
+                await engine.start_connection_pool()
+            if isinstance(engine, InstrumentedPostgresEngine):
+                register_metrics("db_pool", engine.pool_stats)
             logger.info(
                 f"postgresql version: {await engine.get_version()}, "
                 "The database connection pool is opened and then the database check is run."
             )
-            await check_database(engine)
-        except Exception:
-            logger.error("Unable to connect to the database")
+            await check_database(engine, timer)
+            with timer.phase("bootstrap"):
+                await BOOTSTRAP_LATCH.refresh(lambda: User.exists().run())
+        except MigrationError as e:
+            # 表结构与代码不一致时继续提供服务只会产生错误数据, 中止启动
+            logger.error(f"Database migrations are not up to date: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unable to connect to the database: {e}")
+        try:
+            router = get_replica_router()
+            with timer.phase("replicas"):
+                await router.start()
+            register_metrics("db_replicas", router.stats)
+        except Exception as e:
+            # 没有通过健康检查的副本时读请求全部留在主库
+            logger.error(f"Unable to start the read replicas: {e}")
+        finally:
+            logger.info(f"Database startup: {timer.summary()}")
 
     async def close_database_connection_pool(application: Application) -> None:
         try:
             engine = engine_finder()
             if engine is None:
                 raise Exception("No engine found")
+            await get_replica_router().close()
             await engine.close_connection_pool()
         except Exception:
             logger.error("Unable to close the database connection pool")
@@ -2,6 +2,7 @@ from blacksheep import Application
 from blacksheep.server.openapi.v3 import OpenAPIHandler
 from openapidocs.v3 import Info
 from app.settings import Settings
+from utils.compression import get_precompressed_cache
 from utils.scalar.scalar_docs import ScalarUIProvider
 
 
@@ -13,5 +14,15 @@ def configure_docs(app: Application, settings: Settings) -> None:
         docs = OpenAPIHandler(
             info=Info(title="NazoNexus API", version="0.0.1"), anonymous_access=True
         )
-        docs.ui_providers[0] = ScalarUIProvider()
+        ui_provider = ScalarUIProvider()
+        docs.ui_providers[0] = ui_provider
         docs.bind_app(app)
+
+        async def precompress_docs(application: Application) -> None:
+            # 在 build_docs 之后执行, 文档内容此后不再变化
+            cache = get_precompressed_cache()
+            cache.register(docs._json_docs)
+            cache.register(docs._yaml_docs)
+            cache.register(ui_provider._ui_html)
+
+        app.after_start += precompress_docs
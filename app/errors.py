@@ -1,6 +1,6 @@
 import typing as t
 from blacksheep import Application, Request, Response
-from utils.responses import jsonify, StatusCode, ApiResponse
+from utils.responses import ErrorResponder, HeaderType, StatusCode
 from blacksheep.exceptions import (
     BadRequest,
     Unauthorized,
@@ -12,88 +12,86 @@ from blacksheep.exceptions import (
 )
 from blacksheep.server.authentication import AuthenticateChallenge
 from guardpost.authorization import ForbiddenError, UnauthorizedError
+from utils.bindings import PayloadTooLarge
+from utils.metrics import register_metrics
+from utils.password import PasswordHasherBusy
 
+ErrorHandler = t.Callable[[Application, Request, Exception], t.Awaitable[Response]]
 
-def configure_error_handlers(app: Application) -> None:
 
-    async def not_found_handler(
-        app: Application, request: Request, exception: Exception
-    ) -> Response:
-        return jsonify(
-            data=ApiResponse(
-                code=StatusCode.PAGE_NOT_FOUND,
-                message=str(exception) if exception else "Not found",
-            ),
-            status=404,
-        )
-
-    async def bad_request_exception(
-        app: Application, request: Request, exception: Exception
-    ) -> Response:
-        return jsonify(
-            data=ApiResponse(
-                code=StatusCode.INVALID_PARAMS,
-                message=str(exception) if exception else "Empty Argument",
-            ),
-            status=400,
-        )
+def error_handler(
+    responder: ErrorResponder,
+    status: int,
+    code: StatusCode,
+    default: str,
+    *known: str,
+    headers: t.Optional[t.Callable[[], t.List[HeaderType]]] = None,
+) -> ErrorHandler:
+    """
+    构造错误处理函数: ``default`` 与 ``known`` (异常自带的默认消息) 在此预编码,
+    运行时只有自定义消息需要重新编码
+    """
+    responder.prepare(code, default, *known)
 
-    async def not_implemented(
+    async def handler(
         app: Application, request: Request, exception: Exception
     ) -> Response:
-        return jsonify(
-            data=ApiResponse(
-                code=StatusCode.SERVER_EXCEPTION,
-                message=str(exception) if exception else "Not implemented",
-            ),
-            status=501,
+        return responder.respond(
+            status,
+            code,
+            str(exception) if exception else default,
+            # Response 会直接修改传入的 headers 列表, 每次都需要新建
+            headers() if headers is not None else None,
         )
 
-    async def unauthorized(
-        app: Application, request: Request, exception: Exception
-    ) -> Response:
-        # 本服务不支持 WWW-Authenticate 认证, 所以不需要返回 WWW-Authenticate 头
-        return jsonify(
-            data=ApiResponse(
-                code=StatusCode.AUTH_FAILED,
-                message=str(exception) if exception else "Unauthorized",
-            ),
-            headers=None,
-            status=401,
-        )
+    return handler
 
-    async def forbidden(
-        app: Application, request: Request, exception: Exception
-    ) -> Response:
-        return jsonify(
-            data=ApiResponse(
-                code=StatusCode.FORBIDDEN,
-                message=str(exception) if exception else "Forbidden",
-            ),
-            status=403,
-        )
 
-    async def range_not_satisfiable(
-        app: Application, request: Request, exception: Exception
-    ) -> Response:
-        return jsonify(
-            data=ApiResponse(
-                code=StatusCode.RANGE_NOT_SATISFIABLE,
-                message=str(exception) if exception else "Range Not Satisfiable",
-            ),
-            status=416,
-        )
+def configure_error_handlers(app: Application) -> None:
+    responder = ErrorResponder()
+    register_metrics("errors", responder.stats)
 
-    async def internal_server_error(
-        app: Application, request: Request, exception: Exception
-    ) -> Response:
-        return jsonify(
-            data=ApiResponse(
-                code=StatusCode.SERVER_ERROR,
-                message=str(exception) if exception else "Internal Server Error",
-            ),
-            status=500,
-        )
+    not_found_handler = error_handler(
+        responder, 404, StatusCode.PAGE_NOT_FOUND, "Not found"
+    )
+    bad_request_exception = error_handler(
+        responder, 400, StatusCode.INVALID_PARAMS, "Empty Argument", "Bad request"
+    )
+    not_implemented = error_handler(
+        responder,
+        501,
+        StatusCode.SERVER_EXCEPTION,
+        "Not implemented",
+        "Not implemented by server",
+    )
+    # 本服务不支持 WWW-Authenticate 认证, 所以不需要返回 WWW-Authenticate 头
+    unauthorized = error_handler(responder, 401, StatusCode.AUTH_FAILED, "Unauthorized")
+    forbidden = error_handler(responder, 403, StatusCode.FORBIDDEN, "Forbidden")
+    range_not_satisfiable = error_handler(
+        responder,
+        416,
+        StatusCode.RANGE_NOT_SATISFIABLE,
+        "Range Not Satisfiable",
+        "Range not satisfiable",
+    )
+    payload_too_large = error_handler(
+        responder, 413, StatusCode.PAYLOAD_TOO_LARGE, "Payload Too Large"
+    )
+    internal_server_error = error_handler(
+        responder,
+        500,
+        StatusCode.SERVER_ERROR,
+        "Internal Server Error",
+        "Internal server error",
+    )
+    service_unavailable = error_handler(
+        responder,
+        503,
+        StatusCode.SERVICE_BUSY,
+        "Service Unavailable",
+        str(PasswordHasherBusy()),
+        headers=lambda: [(b"Retry-After", b"1")],
+    )
 
     app.exceptions_handlers.update(
         {
@@ -107,8 +105,12 @@ def configure_error_handlers(app: Application) -> None:
             RangeNotSatisfiable: range_not_satisfiable,
             InternalServerError: internal_server_error,
             NotImplementedByServer: not_implemented,
+            PasswordHasherBusy: service_unavailable,
+            PayloadTooLarge: payload_too_large,
             404: not_found_handler,
             400: bad_request_exception,
+            413: payload_too_large,
             500: internal_server_error,
+            503: service_unavailable,
         }
     )
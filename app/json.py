@@ -1,13 +1,15 @@
 from typing import Any
 from blacksheep import Application
 from blacksheep.settings.json import json_settings
-from utils.responses import ENCODER, DECODER
+from utils.codecs import ENCODER, DECODER
 from msgspec.json import format
 
 
 def configure_json(app: Application) -> None:
     """
     Configure JSON serialization settings for the application.
+    BlackSheep 要求 ``dumps`` 返回 str 并自行编码为 bytes, 只用于其内置的
+    ``json()`` 等辅助函数; 本项目的接口统一使用 ``jsonify``, 直接写出 bytes
     """
 
     def serialize(obj: Any) -> str:
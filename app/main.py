@@ -5,6 +5,7 @@ This module configures the BlackSheep application before it starts.
 from blacksheep import Application
 from rodi import Container
 from app.auth import configure_authentication
+from app.compression import configure_compression
 from app.cors import configure_cors
 from app.docs import configure_docs
 from app.errors import configure_error_handlers
@@ -27,6 +28,7 @@ def configure_application(
     configure_authentication(app=app, settings=settings)
     configure_json(app=app)
     configure_cors(app=app, settings=settings)
+    configure_compression(app=app, settings=settings)
     configure_error_handlers(app=app)
     configure_db(app=app)
     configure_docs(app=app, settings=settings)
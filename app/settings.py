@@ -1,6 +1,7 @@
 from datetime import timedelta
 from pathlib import Path
-from msgspec import Struct
+import typing as t
+from msgspec import Struct, field
 from msgspec import toml
 
 BASE_DIR = Path(__file__).parent.parent
@@ -27,12 +28,164 @@ class Site(Struct):
     description: str
 
 
+class Pool(Struct):
+    """
+    asyncpg 连接池参数, 与 ``asyncpg.create_pool`` 的同名参数一致
+    """
+
+    min_size: int = 10
+    max_size: int = 10
+    # 单个连接执行多少次查询后被替换
+    max_queries: int = 50000
+    # 空闲连接超过该时间(秒)后关闭, 0 表示不关闭
+    max_inactive_connection_lifetime: float = 300.0
+    # 每个连接的预处理语句缓存大小, 使用 pgbouncer 事务模式时需设为 0
+    statement_cache_size: int = 100
+    # 单条语句的默认超时(秒), None 表示不限制
+    command_timeout: t.Optional[float] = None
+
+    def options(self) -> dict[str, t.Any]:
+        options: dict[str, t.Any] = {
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "max_queries": self.max_queries,
+            "max_inactive_connection_lifetime": self.max_inactive_connection_lifetime,
+            "statement_cache_size": self.statement_cache_size,
+        }
+        if self.command_timeout is not None:
+            options["command_timeout"] = self.command_timeout
+        return options
+
+
+class Replica(Struct):
+    host: str
+    port: int = 5432
+    # 未设置时沿用主库的值
+    database: t.Optional[str] = None
+    user: t.Optional[str] = None
+    password: t.Optional[str] = None
+
+
+class Replicas(Struct):
+    nodes: list[Replica] = field(default_factory=list)
+    # 读请求的分配方式: "round_robin" 轮询 | "least_busy" 选择占用连接最少的副本
+    strategy: t.Literal["round_robin", "least_busy"] = "round_robin"
+    # 复制延迟超过该值(秒)的副本暂不接收读请求, 0 表示不检查延迟
+    max_lag: float = 0
+    # 副本健康检查的间隔(秒); 连接失败的副本在检查通过后重新接收读请求
+    lag_check_interval: float = 5.0
+    # 用户写入后在该时间(秒)内, 其读请求固定走主库 (仅在当前 worker 内生效)
+    sticky_window: float = 5.0
+
+
 class Database(Struct):
     database: str
     user: str
     password: str
     host: str
     port: int
+    # 启动时的迁移行为: "run" 执行迁移 | "verify" 仅检查 | "skip" 跳过
+    migrations: t.Literal["run", "verify", "skip"] = "run"
+    pool: Pool = field(default_factory=Pool)
+    replicas: Replicas = field(default_factory=Replicas)
+
+
+class PasswordHashing(Struct):
+    executor: t.Literal["thread", "process"] = "thread"
+    # 0 表示按 CPU 核数自动决定
+    max_workers: int = 0
+    # 排队 + 执行中的任务上限, 超出后直接返回 503
+    max_pending: int = 64
+
+
+CountStrategy = t.Literal["exact", "estimated", "has_more"]
+
+
+def _default_count_strategy() -> dict[str, CountStrategy]:
+    return {"posts.list": "exact"}
+
+
+class Pagination(Struct):
+    default_size: int = 10
+    max_size: int = 100
+    # 按路由名选择总数的统计方式, 未列出的路由只返回是否有下一页 ("has_more"):
+    # "exact" 精确计数, 写入时增量维护 | "estimated" 读取 pg_class.reltuples 估算
+    count_strategy: dict[str, CountStrategy] = field(
+        default_factory=_default_count_strategy
+    )
+    # 缓存时间(秒); 精确计数只感知本 worker 的写入, 其他 worker 的写入在过期后才会计入
+    exact_count_ttl: int = 300
+    estimated_count_ttl: int = 60
+
+
+class AuthCache(Struct):
+    local_maxsize: int = 4096
+    # 本地层条目最长存活时间(秒), 同时也是其他 worker 感知吊销的最大延迟
+    local_ttl: int = 300
+    # 共享层: "none" | "redis" | "shm" (同一主机的多个 worker 共享内存)
+    backend: t.Literal["none", "redis", "shm"] = "none"
+    redis_url: str = "redis://localhost:6379/0"
+    shm_name: str = "nazo_identity_cache"
+    shm_slots: int = 16384
+    # 被拒绝 token 的负缓存
+    negative_maxsize: int = 4096
+    negative_ttl: int = 60
+    # 认证失败汇总日志的输出间隔(秒)
+    failure_log_interval: int = 60
+
+
+def _default_cache_control() -> dict[str, str]:
+    return {
+        "posts.list": "public, max-age=0, must-revalidate",
+        "posts.detail": "public, max-age=60",
+    }
+
+
+class HttpCache(Struct):
+    """
+    公开 GET 接口的响应缓存, 仅在当前 worker 内生效
+    """
+
+    enabled: bool = True
+    maxsize: int = 1024
+    # 条目最长存活时间(秒), 同时也是其他 worker 感知文章变更的最大延迟
+    ttl: int = 60
+    # 超过该大小(字节)的响应不缓存
+    max_entry_size: int = 1024 * 1024
+    # 按路由名配置的 Cache-Control 响应头
+    cache_control: dict[str, str] = field(default_factory=_default_cache_control)
+
+
+class BulkInsert(Struct):
+    # 单次请求最多的文章数
+    max_batch: int = 10000
+    # 每个分块一条语句; 分块行数达到 copy_threshold 时改用 COPY
+    chunk_size: int = 1000
+    copy_threshold: int = 500
+
+
+Encoding = t.Literal["br", "zstd", "gzip"]
+
+
+def _default_encodings() -> list[Encoding]:
+    return ["br", "zstd", "gzip"]
+
+
+class Compression(Struct):
+    """
+    响应压缩, 按客户端的 Accept-Encoding 协商
+    """
+
+    enabled: bool = True
+    # 按优先级排列; "br" 需要安装 brotli, "zstd" 需要安装 zstandard, 未安装时跳过
+    encodings: list[Encoding] = field(default_factory=_default_encodings)
+    # 小于该大小(字节)的响应体不压缩
+    min_size: int = 1024
+    # 达到该大小(字节)的响应体在线程池中压缩, 避免阻塞事件循环
+    thread_threshold: int = 64 * 1024
+    max_workers: int = 2
+    # 预压缩缓存 (OpenAPI 文档, 文档页面, 已缓存的接口响应) 最多保存的响应体数量
+    precompressed_maxsize: int = 256
 
 
 class Settings(Struct):
@@ -40,6 +193,12 @@ class Settings(Struct):
     jwt: JWT
     site: Site
     database: Database
+    password: PasswordHashing = field(default_factory=PasswordHashing)
+    pagination: Pagination = field(default_factory=Pagination)
+    auth_cache: AuthCache = field(default_factory=AuthCache)
+    http_cache: HttpCache = field(default_factory=HttpCache)
+    bulk_insert: BulkInsert = field(default_factory=BulkInsert)
+    compression: Compression = field(default_factory=Compression)
 
 
 _setting = None
@@ -0,0 +1,95 @@
+"""
+msgspec 编解码方式基准, 使用实际的 schema, 不需要数据库:
+- 解码: ``msgspec.json.decode(type=...)`` / 每次新建 ``Decoder`` /
+  ``json_decoder`` 缓存的 Decoder
+- 编码 ``ApiResponse``: ``msgspec.json.encode`` / 每次新建 ``Encoder`` / 共享的 ``ENCODER``,
+  以及之前 JSON 设置中 bytes -> str -> bytes 的往返
+
+    python -m benchmarks.codecs --rows 20
+"""
+
+import argparse
+import timeit
+import typing as t
+
+import msgspec
+
+from benchmarks.encoding import make_rows
+from blog.endpoints.posts_api import hydrate_authors
+from blog.schema import PostSummary
+from schemas.account_schemas import RegisterInput
+from user.schema import LoginInput
+from utils.codecs import ENCODER, json_decoder
+from utils.responses import ApiResponse, to_structs
+
+
+def _best_of(fn: t.Callable[[], t.Any]) -> float:
+    """
+    单次调用耗时 (微秒), 取 5 轮中的最小值
+    """
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=5, number=number)) / number * 1e6
+
+
+def bench_decode(rows: int) -> None:
+    posts = to_structs(hydrate_authors(make_rows(rows)), PostSummary)
+    cases: dict[str, tuple[t.Any, bytes]] = {
+        "LoginInput": (
+            LoginInput,
+            b'{"username": "admin", "password": "correct horse battery"}',
+        ),
+        "RegisterInput": (
+            RegisterInput,
+            b'{"username": "admin", "password": "correct horse battery", '
+            b'"nickname": "Admin", "email": "admin@example.com"}',
+        ),
+        f"ApiResponse[{rows}]": (
+            ApiResponse[list[PostSummary]],
+            ENCODER.encode(ApiResponse(data=posts)),
+        ),
+    }
+    print("decode (us/call)")
+    print(f"{'':>18} {'decode(type=)':>14} {'new Decoder':>12} {'cached':>10}")
+    for name, (type, body) in cases.items():
+        decoder = json_decoder(type)
+        by_function = _best_of(lambda: msgspec.json.decode(body, type=type))
+        by_new = _best_of(lambda: msgspec.json.Decoder(type).decode(body))
+        by_cached = _best_of(lambda: decoder.decode(body))
+        print(f"{name:>18} {by_function:>14.2f} {by_new:>12.2f} {by_cached:>10.2f}")
+
+
+def bench_encode(rows: int) -> None:
+    posts = to_structs(hydrate_authors(make_rows(rows)), PostSummary)
+    cases = {
+        "ApiResponse": ApiResponse(message="ok"),
+        f"ApiResponse[{rows}]": ApiResponse(data=posts),
+    }
+    print()
+    print("encode (us/call)")
+    print(
+        f"{'':>18} {'encode()':>10} {'new Encoder':>12} {'shared':>10} "
+        f"{'via str':>10}"
+    )
+    for name, value in cases.items():
+        by_function = _best_of(lambda: msgspec.json.encode(value))
+        by_new = _best_of(lambda: msgspec.json.Encoder().encode(value))
+        by_shared = _best_of(lambda: ENCODER.encode(value))
+        # 之前的 serialize 返回 str, BlackSheep 再编码回 bytes
+        via_str = _best_of(lambda: ENCODER.encode(value).decode("utf-8").encode())
+        print(
+            f"{name:>18} {by_function:>10.2f} {by_new:>12.2f} {by_shared:>10.2f} "
+            f"{via_str:>10.2f}"
+        )
+
+
+def main(rows: int) -> None:
+    bench_decode(rows)
+    bench_encode(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20)
+    args = parser.parse_args()
+    main(args.rows)
@@ -0,0 +1,75 @@
+"""
+文章列表编码基准: 对比 Piccolo 返回的 dict 直接编码与转换为 ``PostSummary`` 后编码.
+不需要数据库:
+
+    python -m benchmarks.encoding --rows 10 100 1000
+"""
+
+import argparse
+import timeit
+import typing as t
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from blog.endpoints.posts_api import hydrate_authors
+from blog.schema import PostSummary
+from utils.codecs import ENCODER
+from utils.responses import ApiResponse, to_structs
+
+
+def make_rows(count: int) -> list[dict[str, t.Any]]:
+    """
+    与 ``SUMMARY_COLUMNS`` 查询结果相同结构的行
+    """
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": uuid4(),
+            "title": f"Post title {i}",
+            "excerpt": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 3,
+            "author": uuid4(),
+            "author_username": f"author{i % 10}",
+            "author_nickname": None,
+            "created_at": now,
+            "updated_at": now if i % 2 else None,
+        }
+        for i in range(count)
+    ]
+
+
+def _best_of(fn: t.Callable[[], t.Any], number: int) -> float:
+    """
+    单次调用耗时 (微秒), 取 5 轮中的最小值
+    """
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main(sizes: list[int]) -> None:
+    print(f"{'rows':>6} {'dict':>12} {'struct':>12} {'convert+struct':>16}  (us/call)")
+    for size in sizes:
+        rows = make_rows(size)
+        structs = to_structs(hydrate_authors(make_rows(size)), PostSummary)
+        number = max(10, 100_000 // size)
+
+        by_dict = _best_of(lambda: ENCODER.encode(ApiResponse(data=rows)), number)
+        by_struct = _best_of(lambda: ENCODER.encode(ApiResponse(data=structs)), number)
+        # 包含每次请求都要执行的 dict -> Struct 转换;
+        # hydrate_authors 会修改传入的行, 每次使用副本 (复制开销也计入其中)
+        end_to_end = _best_of(
+            lambda: ENCODER.encode(
+                ApiResponse(
+                    data=to_structs(
+                        hydrate_authors([dict(row) for row in rows]), PostSummary
+                    )
+                )
+            ),
+            number,
+        )
+        print(f"{size:>6} {by_dict:>12.1f} {by_struct:>12.1f} {end_to_end:>16.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+    main(args.rows)
@@ -0,0 +1,93 @@
+"""
+响应编码的分配基准, 不需要数据库:
+- response: 单个 ``ApiResponse`` 用 ``ENCODER.encode`` 编码, 与写入复用缓冲区再复制对比
+- export: 导出批次用 ``b",".join`` 连接, 与 ``encode_joined`` 对比
+耗时在未开启 tracemalloc 时测量, 峰值内存在开启 tracemalloc 后单独测量:
+
+    python -m benchmarks.jsonify --count 1000000 --rows 10 100 1000 5000
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+import typing as t
+
+from benchmarks.encoding import make_rows
+from blog.endpoints.posts_api import hydrate_authors
+from blog.schema import PostSummary
+from utils import codecs
+from utils.codecs import ENCODER, encode_joined
+from utils.responses import ApiResponse, to_structs
+
+
+def _measure(fn: t.Callable[[], t.Any], number: int) -> tuple[float, float]:
+    """
+    返回单次调用耗时 (微秒) 与 ``number`` 次调用期间的峰值内存 (KiB)
+    """
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    elapsed = (time.perf_counter() - start) / number * 1e6
+
+    tracemalloc.start()
+    try:
+        for _ in range(number):
+            fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak / 1024
+
+
+def bench_response(count: int) -> None:
+    response = ApiResponse(data={"id": 1, "title": "Post title", "tags": ["a", "b"]})
+    buffer = bytearray()
+
+    def into_buffer() -> bytes:
+        ENCODER.encode_into(response, buffer)
+        return bytes(buffer)
+
+    print(f"response x {count}")
+    print(f"{'':>16} {'us/call':>10} {'peak KiB':>10}")
+    for name, fn in (
+        ("encode", lambda: ENCODER.encode(response)),
+        ("encode_into", into_buffer),
+    ):
+        elapsed, peak = _measure(fn, count)
+        print(f"{name:>16} {elapsed:>10.3f} {peak:>10.1f}")
+
+
+def bench_export(sizes: list[int]) -> None:
+    print()
+    print("export batch")
+    print(
+        f"{'rows':>6} {'join us':>10} {'joined us':>10} "
+        f"{'join KiB':>10} {'joined KiB':>10} {'buffer KiB':>10}"
+    )
+    for size in sizes:
+        posts = to_structs(hydrate_authors(make_rows(size)), PostSummary)
+        number = max(10, 100_000 // size)
+        by_join, join_peak = _measure(
+            lambda: b",".join([ENCODER.encode(post) for post in posts]), number
+        )
+        by_joined, joined_peak = _measure(lambda: encode_joined(posts, b","), number)
+        # 调用结束后复用缓冲区仍占用的内存
+        kept = sys.getsizeof(codecs._buffer) / 1024
+        print(
+            f"{size:>6} {by_join:>10.1f} {by_joined:>10.1f} "
+            f"{join_peak:>10.1f} {joined_peak:>10.1f} {kept:>10.1f}"
+        )
+
+
+def main(count: int, sizes: list[int]) -> None:
+    bench_response(count)
+    bench_export(sizes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    args = parser.parse_args()
+    main(args.count, args.rows)
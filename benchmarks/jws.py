@@ -0,0 +1,152 @@
+"""
+JWT 签名/验证吞吐量基准 (单线程, 即每核), 不需要数据库, 密钥在临时目录中生成:
+- ed25519: 只做 Ed25519 签名/验证, 作为下限
+- pyjwt: PyJWT 的 ``jwt.encode``/``jwt.decode``
+- jws: 直接使用 cryptography + msgspec 的 ``JWTCodec``
+以及包含 ``TokenPayload`` 转换的完整往返, 使用 secret/ 中的密钥
+(不存在时与应用启动时一样生成):
+- to_builtins+pyjwt: 切换前的 ``to_builtins`` -> PyJWT, PyJWT -> ``convert``
+- JWTService: ``generate_jwt``/``verify_jwt``
+签名运算占大部分耗时, 最后单独比较 payload 的序列化 (不含签名与 base64):
+- json+convert: PyJWT 内部的 ``json.dumps``/``json.loads`` 加上 ``to_builtins``/``convert``
+- msgspec: ``JWTCodec`` 使用的 ``ENCODER`` 与 ``VerifiedClaims`` Decoder
+
+    python -m benchmarks.jws
+"""
+
+import argparse
+import json
+import tempfile
+import timeit
+import typing as t
+from pathlib import Path
+
+import jwt
+from msgspec import convert, to_builtins
+from uuid_utils.compat import uuid7
+
+from utils.codecs import ENCODER, json_decoder
+from utils.jws import JWTCodec, VerifiedClaims
+from utils.keyring import KeyRing
+from utils.token import SETTINGS, JWTService, TokenPayload
+
+ISSUER = "nazo-benchmark"
+
+
+def _throughput(fn: t.Callable[[], t.Any], repeat: int) -> float:
+    """
+    每秒调用次数, 取 ``repeat`` 轮中的最大值
+    """
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return number / min(timer.repeat(repeat=repeat, number=number))
+
+
+def _print_row(
+    name: str, sign: t.Callable[[], t.Any], verify: t.Callable[[], t.Any], repeat: int
+) -> None:
+    print(
+        f"{name:>18} {_throughput(sign, repeat):>10.0f} "
+        f"{_throughput(verify, repeat):>10.0f}"
+    )
+
+
+def bench_jws(keyring: KeyRing, repeat: int) -> None:
+    key = keyring.signing_key()
+    assert key.private_key is not None
+    codec = JWTCodec(keyring=keyring, issuer=ISSUER)
+    payload = TokenPayload(sub=uuid7(), iss=ISSUER)
+    claims = to_builtins(payload)
+    token = codec.encode(payload)
+    signing_input, _, _ = token.encode().rpartition(b".")
+    signature = key.private_key.sign(signing_input)
+
+    cases: dict[str, tuple[t.Callable[[], t.Any], t.Callable[[], t.Any]]] = {
+        "ed25519": (
+            lambda: key.private_key.sign(signing_input),  # type: ignore[union-attr]
+            lambda: key.public_key.verify(signature, signing_input),
+        ),
+        "pyjwt": (
+            lambda: jwt.encode(
+                claims, key.private_key, algorithm="EdDSA", headers={"kid": key.kid}
+            ),
+            lambda: jwt.decode(
+                token,
+                key.public_key,
+                algorithms=["EdDSA"],
+                issuer=ISSUER,
+                options={"require": ["exp", "iss", "sub"]},
+            ),
+        ),
+        "jws": (lambda: codec.encode(payload), lambda: codec.decode(token)),
+    }
+    print(f"{'':>18} {'sign/s':>10} {'verify/s':>10}")
+    for name, (sign, verify) in cases.items():
+        _print_row(name, sign, verify, repeat)
+
+
+def bench_service(repeat: int) -> None:
+    service = JWTService()
+    key = service.keyring.signing_key()
+    payload = TokenPayload(sub=uuid7())
+    token = service.generate_jwt(payload)
+
+    def legacy_generate() -> str:
+        return jwt.encode(
+            payload=to_builtins(payload),
+            key=key.private_key,
+            algorithm="EdDSA",
+            headers={"alg": "EdDSA", "typ": "JWT", "kid": key.kid},
+        )
+
+    def legacy_verify() -> TokenPayload:
+        claims = jwt.decode(
+            token,
+            key=key.public_key,
+            algorithms=["EdDSA"],
+            issuer=SETTINGS.jwt.issuer,
+            options={"verify_signature": True, "require": ["exp", "iss", "sub"]},
+        )
+        return convert(claims, type=TokenPayload)
+
+    print()
+    print(f"{'':>18} {'sign/s':>10} {'verify/s':>10}")
+    _print_row("to_builtins+pyjwt", legacy_generate, legacy_verify, repeat)
+    _print_row(
+        "JWTService",
+        lambda: service.generate_jwt(payload),
+        lambda: service.verify_jwt(token),
+        repeat,
+    )
+
+
+def bench_payload(repeat: int) -> None:
+    payload = TokenPayload(sub=uuid7())
+    raw = ENCODER.encode(payload)
+    decoder = json_decoder(VerifiedClaims)
+
+    print()
+    print(f"{'':>18} {'encode/s':>10} {'decode/s':>10}")
+    _print_row(
+        "json+convert",
+        lambda: json.dumps(to_builtins(payload), separators=(",", ":")).encode(),
+        lambda: convert(json.loads(raw), type=TokenPayload),
+        repeat,
+    )
+    _print_row(
+        "msgspec", lambda: ENCODER.encode(payload), lambda: decoder.decode(raw), repeat
+    )
+
+
+def main(repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as secret_dir:
+        bench_jws(KeyRing(secret_dir=Path(secret_dir)), repeat)
+    bench_service(repeat)
+    bench_payload(repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.repeat)
@@ -0,0 +1,72 @@
+"""
+深分页基准: 对比 ``page`` (offset) 与 ``cursor`` (keyset) 在不同翻页深度下的耗时.
+需要 config.toml 中配置的数据库, 并且 posts 表中已有足够的数据:
+
+    python -m benchmarks.pagination --size 20 --depths 1 10 100 1000
+"""
+
+import argparse
+import asyncio
+from statistics import median
+from time import perf_counter
+
+from blog.endpoints.posts_api import SUMMARY_COLUMNS
+from blog.tables import Posts
+from utils.pagination import Cursor, keyset_paginate
+
+
+async def _timed(repeat: int, **kwargs) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = perf_counter()
+        await keyset_paginate(
+            Posts.select(*SUMMARY_COLUMNS),
+            order_column=Posts.created_at,
+            id_column=Posts.id,
+            **kwargs,
+        )
+        samples.append((perf_counter() - start) * 1000)
+    return median(samples)
+
+
+async def _cursor_before(offset: int) -> Cursor:
+    """
+    第 ``offset`` 行之前一行的游标, 与从第一页逐页翻到该深度得到的游标相同
+    """
+    row = (
+        await Posts.select(Posts.created_at, Posts.id)
+        .order_by(Posts.created_at, Posts.id, ascending=False)
+        .offset(offset - 1)
+        .first()
+    )
+    if row is None:
+        raise SystemExit(f"posts 表中的数据不足 {offset} 行")
+    return Cursor(row["created_at"], row["id"])
+
+
+async def main(size: int, depths: list[int], repeat: int) -> None:
+    engine = Posts._meta.db
+    await engine.start_connection_pool()
+    try:
+        total = await Posts.count()
+        print(f"posts: {total}, size: {size}, repeat: {repeat} (median ms)")
+        print(f"{'page':>8} {'offset':>10} {'keyset':>10}")
+        for depth in depths:
+            offset = (depth - 1) * size
+            if offset >= total:
+                break
+            by_offset = await _timed(repeat, size=size, offset=offset)
+            cursor = await _cursor_before(offset) if offset else None
+            by_cursor = await _timed(repeat, size=size, cursor=cursor)
+            print(f"{depth:>8} {by_offset:>10.2f} {by_cursor:>10.2f}")
+    finally:
+        await engine.close_connection_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=20)
+    parser.add_argument("--depths", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.size, args.depths, args.repeat))
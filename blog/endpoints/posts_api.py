@@ -1,8 +1,90 @@
-from blacksheep import Response, FromQuery
-from blacksheep.server.controllers import APIController, get
+import typing as t
+from contextlib import aclosing
+from uuid import UUID
+from blacksheep import FromQuery, Request, Response, StreamedContent, auth
+from blacksheep.server.controllers import APIController, get, post
 
+from app.settings import load_settings
+from blog.schema import (
+    AuthorSummary,
+    BulkPostsInput,
+    BulkPostsResult,
+    PostDetail,
+    PostSearchHit,
+    PostSummary,
+)
 from blog.tables import Posts
-from utils.responses import ApiResponse, StatusCode, jsonify
+from utils.bindings import FromSchema
+from utils.counts import get_count_service
+from utils.db_replicas import get_replica_router
+from utils.identity import UserIdentity
+from utils.pagination import RankCursor, get_cursor_codec, keyset_paginate
+from utils.response_cache import CachedBody, get_response_cache
+from utils.streaming import iter_batches
+from utils.codecs import ENCODER, encode_joined
+from utils.responses import (
+    ApiResponse,
+    PageMeta,
+    StatusCode,
+    jsonify,
+    to_struct,
+    to_structs,
+)
+
+PAGINATION = load_settings().pagination
+BULK_INSERT = load_settings().bulk_insert
+
+# 列表只返回摘要字段, 不读取 content;
+# 作者信息通过 LEFT JOIN 在同一条查询中取得, 只读取 auth_user 的两列
+SUMMARY_COLUMNS = (
+    Posts.id,
+    Posts.title,
+    Posts.excerpt,
+    Posts.author,
+    Posts.author.username.as_alias("author_username"),
+    Posts.author.nickname.as_alias("author_nickname"),
+    Posts.created_at,
+    Posts.updated_at,
+)
+DETAIL_COLUMNS = (*SUMMARY_COLUMNS, Posts.content)
+
+SEARCH_MAX_LENGTH = 200
+EXPORT_BATCH_SIZE = 500
+
+
+def hydrate_authors(rows: t.Iterable[t.Mapping[str, t.Any]]) -> list[dict[str, t.Any]]:
+    """
+    将 JOIN 得到的 ``author_*`` 列合并为 ``AuthorSummary``, 供 ``to_structs`` 使用.
+    asyncpg ``Record`` 不可修改, 会先转换为 dict
+    """
+    hydrated = []
+    for row in rows:
+        row = row if isinstance(row, dict) else dict(row)
+        if row["author"] is not None:
+            row["author"] = AuthorSummary(
+                row["author"], row["author_username"], row["author_nickname"]
+            )
+        hydrated.append(row)
+    return hydrated
+
+
+EXPORT_CONTENT_TYPES = {
+    "ndjson": b"application/x-ndjson",
+    "json": b"application/json",
+}
+
+
+async def fetch_detail(post_id: UUID, node: t.Optional[str]) -> t.Optional[dict]:
+    post = (
+        await Posts.select(*DETAIL_COLUMNS)
+        .where(Posts.id == post_id)
+        .first()
+        .run(node=node)
+    )
+    if post is None and node is not None:
+        # 副本可能尚未同步刚创建的文章, 未命中时回到主库确认
+        post = await Posts.select(*DETAIL_COLUMNS).where(Posts.id == post_id).first()
+    return post
 
 
 class PostsAPI(APIController):
@@ -11,7 +93,17 @@ class PostsAPI(APIController):
         return "posts"
 
     @get("/list")
-    async def get_list(self, page: FromQuery[int] = FromQuery(1)):
+    async def get_list(
+        self,
+        request: Request,
+        user: UserIdentity,
+        page: FromQuery[int] = FromQuery(1),
+        size: FromQuery[t.Optional[int]] = FromQuery(None),
+        cursor: FromQuery[t.Optional[str]] = FromQuery(None),
+    ) -> Response:
+        """
+        优先使用 ``cursor`` (keyset) 分页, ``page`` 仅为兼容保留, 翻页越深越慢
+        """
         _page = page.value
         if _page < 1:
             return jsonify(
@@ -20,14 +112,214 @@ class PostsAPI(APIController):
                     message="Page must be greater than 0.",
                 )
             )
+        _size = size.value if size.value is not None else PAGINATION.default_size
+        if _size < 1:
+            return jsonify(
+                ApiResponse(
+                    code=StatusCode.INVALID_PARAMS,
+                    message="Size must be greater than 0.",
+                )
+            )
+        _size = min(_size, PAGINATION.max_size)
+        _cursor = get_cursor_codec().decode(cursor.value) if cursor.value else None
+
+        async def build() -> CachedBody:
+            result = await keyset_paginate(
+                Posts.select(*SUMMARY_COLUMNS),
+                order_column=Posts.created_at,
+                id_column=Posts.id,
+                size=_size,
+                cursor=_cursor,
+                offset=(_page - 1) * _size,
+                node=get_replica_router().read_node(user.id),
+            )
+            posts = to_structs(hydrate_authors(result.rows), PostSummary)
+            total = await get_count_service().total("posts.list", Posts)
+            body = ENCODER.encode(
+                ApiResponse[list[PostSummary]](
+                    code=StatusCode.SUCCESS,
+                    data=posts,
+                    meta=PageMeta(
+                        size=_size,
+                        next=result.next,
+                        prev=result.prev,
+                        total=total.value if total else None,
+                        estimated=total.estimated if total else False,
+                    ),
+                )
+            )
+            return CachedBody(
+                body,
+                max(
+                    (post.updated_at or post.created_at for post in posts), default=None
+                ),
+            )
+
+        return await get_response_cache().respond(
+            request, "posts.list", build, pin_key=user.id
+        )
+
+    @get("/search")
+    async def search(
+        self,
+        user: UserIdentity,
+        q: FromQuery[str],
+        size: FromQuery[t.Optional[int]] = FromQuery(None),
+        cursor: FromQuery[t.Optional[str]] = FromQuery(None),
+    ) -> Response:
+        """
+        全文搜索标题与正文, 按相关度排序, 通过 ``cursor`` 向后翻页
+        """
+        terms = q.value.strip()
+        if not terms or len(terms) > SEARCH_MAX_LENGTH:
+            return jsonify(
+                ApiResponse(
+                    code=StatusCode.INVALID_PARAMS,
+                    message=f"Query must be 1-{SEARCH_MAX_LENGTH} characters.",
+                ),
+                status=400,
+            )
+        _size = min(max(size.value or PAGINATION.default_size, 1), PAGINATION.max_size)
+        codec = get_cursor_codec()
+        after = codec.decode_rank(cursor.value) if cursor.value else None
+
+        rows = await Posts.search(
+            terms,
+            limit=_size + 1,
+            after=after,
+            node=get_replica_router().read_node(user.id),
+        )
+        has_more = len(rows) > _size
+        hits = to_structs(hydrate_authors(rows[:_size]), PostSearchHit)
         return jsonify(
-            ApiResponse(
+            ApiResponse[list[PostSearchHit]](
                 code=StatusCode.SUCCESS,
-                data=(
-                    await Posts.select()
-                    .limit(10)
-                    .offset((_page - 1) * 10)
-                    .order_by(Posts.created_at, ascending=False)
+                data=hits,
+                meta=PageMeta(
+                    size=_size,
+                    next=(
+                        codec.encode_rank(RankCursor(hits[-1].rank, hits[-1].id))
+                        if has_more
+                        else None
+                    ),
+                ),
+            )
+        )
+
+    @get("/{uuid:post_id}")
+    async def get_detail(
+        self, request: Request, post_id: UUID, user: UserIdentity
+    ) -> Response:
+        """
+        文章详情, 唯一返回完整正文的接口
+        """
+
+        async def build() -> CachedBody:
+            post = await fetch_detail(post_id, get_replica_router().read_node(user.id))
+            if not post:
+                return CachedBody(
+                    ENCODER.encode(
+                        ApiResponse(
+                            code=StatusCode.DATA_NOT_FOUND,
+                            message="Post not found.",
+                        )
+                    ),
+                    status=404,
+                )
+            detail = to_struct(hydrate_authors([post])[0], PostDetail)
+            return CachedBody(
+                ENCODER.encode(
+                    ApiResponse[PostDetail](code=StatusCode.SUCCESS, data=detail)
+                ),
+                detail.updated_at or detail.created_at,
+            )
+
+        # 热门文章被并发访问时合并为一次查询, 404 不会被缓存
+        return await get_response_cache().respond(
+            request, "posts.detail", build, pin_key=user.id
+        )
+
+    @auth("superuser")
+    @get("/export")
+    async def export(
+        self,
+        request: Request,
+        since: FromQuery[t.Optional[UUID]] = FromQuery(None),
+        format: FromQuery[str] = FromQuery("ndjson"),
+    ) -> Response:
+        """
+        按 id (UUIDv7, 即创建顺序) 流式导出全部文章, 用于搜索索引/备份/静态站点生成.
+        ``since`` 为上次导出的最后一个 id, 只导出其后新建的文章;
+        ``format`` 为 ``ndjson`` (每行一篇) 或 ``json`` (数组)
+        """
+        content_type = EXPORT_CONTENT_TYPES.get(format.value)
+        if content_type is None:
+            return jsonify(
+                ApiResponse(
+                    code=StatusCode.INVALID_PARAMS,
+                    message="Format must be `ndjson` or `json`.",
                 ),
+                status=400,
             )
+        as_array = format.value == "json"
+        query = Posts.select(*DETAIL_COLUMNS).order_by(Posts.id)
+        if since.value is not None:
+            query = query.where(Posts.id > since.value)
+        router = get_replica_router()
+        engine = router.engine(router.read_node())
+
+        async def provider() -> t.AsyncIterator[bytes]:
+            if as_array:
+                yield b"["
+            first = True
+            # aclosing: 客户端断开后立即关闭游标并归还连接, 而不是等待 GC
+            async with aclosing(
+                iter_batches(engine, query, EXPORT_BATCH_SIZE)
+            ) as batches:
+                async for rows in batches:
+                    if await request.is_disconnected():
+                        return
+                    posts = to_structs(hydrate_authors(rows), PostDetail)
+                    if as_array:
+                        yield (b"" if first else b",") + encode_joined(posts, b",")
+                    else:
+                        yield encode_joined(posts, b"\n", b"\n")
+                    first = False
+            if as_array:
+                yield b"]"
+
+        return Response(200, content=StreamedContent(content_type, provider))
+
+    @auth("superuser")
+    @post("/bulk")
+    async def bulk_create(
+        self, user: UserIdentity, data: FromSchema[BulkPostsInput]
+    ) -> Response:
+        """
+        批量导入文章 (如迁移旧博客), 作者为当前用户
+        """
+        value = data.value
+        if len(value.posts) > BULK_INSERT.max_batch:
+            return jsonify(
+                ApiResponse(
+                    code=StatusCode.INVALID_PARAMS,
+                    message=f"At most {BULK_INSERT.max_batch} posts per request.",
+                ),
+                status=400,
+            )
+        result = await Posts.bulk_create(
+            value.posts, author_id=t.cast(UUID, user.id), atomic=value.atomic
+        )
+        if not result.created:
+            return jsonify(
+                ApiResponse[BulkPostsResult](
+                    code=StatusCode.INVALID_PARAMS,
+                    data=result,
+                    message="No posts were created.",
+                ),
+                status=400,
+            )
+        return jsonify(
+            ApiResponse[BulkPostsResult](code=StatusCode.SUCCESS, data=result),
+            status=201,
         )
@@ -0,0 +1,31 @@
+from piccolo.apps.migrations.auto.migration_manager import MigrationManager
+from piccolo.table import Table
+
+
+class RawTable(Table):
+    pass
+
+
+ID = "2026-10-18T09:12:41:305118"
+VERSION = "1.24.2"
+DESCRIPTION = "Composite index for keyset pagination on posts"
+
+
+async def forwards() -> MigrationManager:
+    manager = MigrationManager(
+        migration_id=ID, app_name="blog", description=DESCRIPTION
+    )
+
+    async def run() -> None:
+        await RawTable.raw(
+            "CREATE INDEX IF NOT EXISTS posts_created_at_id_idx "
+            "ON posts (created_at DESC, id DESC);"
+        )
+
+    async def run_backwards() -> None:
+        await RawTable.raw("DROP INDEX IF EXISTS posts_created_at_id_idx;")
+
+    manager.add_raw(run)
+    manager.add_raw_backwards(run_backwards)
+
+    return manager
@@ -0,0 +1,38 @@
+from piccolo.apps.migrations.auto.migration_manager import MigrationManager
+from piccolo.columns.column_types import Varchar
+from piccolo.columns.indexes import IndexMethod
+
+
+ID = "2026-10-18T10:03:27:614290"
+VERSION = "1.24.2"
+DESCRIPTION = "Add stored excerpt column to posts"
+
+
+async def forwards() -> MigrationManager:
+    manager = MigrationManager(
+        migration_id=ID, app_name="blog", description=DESCRIPTION
+    )
+
+    manager.add_column(
+        table_class_name="Posts",
+        tablename="posts",
+        column_name="excerpt",
+        db_column_name="excerpt",
+        column_class_name="Varchar",
+        column_class=Varchar,
+        params={
+            "length": 255,
+            "default": "",
+            "null": False,
+            "primary_key": False,
+            "unique": False,
+            "index": False,
+            "index_method": IndexMethod.btree,
+            "choices": None,
+            "db_column_name": None,
+            "secret": False,
+        },
+        schema=None,
+    )
+
+    return manager
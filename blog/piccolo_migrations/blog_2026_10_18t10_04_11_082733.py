@@ -0,0 +1,31 @@
+from piccolo.apps.migrations.auto.migration_manager import MigrationManager
+from piccolo.table import Table
+
+
+class RawTable(Table):
+    pass
+
+
+ID = "2026-10-18T10:04:11:082733"
+VERSION = "1.24.2"
+DESCRIPTION = "Backfill posts.excerpt from content"
+
+
+async def forwards() -> MigrationManager:
+    manager = MigrationManager(
+        migration_id=ID, app_name="blog", description=DESCRIPTION
+    )
+
+    # 与 Posts.make_excerpt 保持一致: 合并空白后截取 200 个字符
+    async def run() -> None:
+        await RawTable.raw(
+            "UPDATE posts SET excerpt = CASE "
+            "WHEN char_length(t.text) <= 200 THEN t.text "
+            "ELSE left(t.text, 199) || '…' END "
+            "FROM (SELECT id, btrim(regexp_replace(content, '\\s+', ' ', 'g')) AS text "
+            "FROM posts) AS t WHERE posts.id = t.id;"
+        )
+
+    manager.add_raw(run)
+
+    return manager
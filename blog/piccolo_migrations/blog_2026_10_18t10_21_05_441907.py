@@ -0,0 +1,43 @@
+from piccolo.apps.migrations.auto.migration_manager import MigrationManager
+from piccolo.table import Table
+
+
+class RawTable(Table):
+    pass
+
+
+ID = "2026-10-18T10:21:05:441907"
+VERSION = "1.24.2"
+DESCRIPTION = "Full-text search vector and GIN index on posts"
+
+
+async def forwards() -> MigrationManager:
+    manager = MigrationManager(
+        migration_id=ID, app_name="blog", description=DESCRIPTION
+    )
+
+    # 标题权重 A, 正文权重 B; 'simple' 配置不做词干提取.
+    # 注意: 默认解析器不对中文分词, 连续的中文字符会成为一个词元,
+    # 只有完整匹配这一段文字的搜索词才能命中 (句子中的某个中文词无法单独搜索).
+    # 需要中文检索时应改用 zhparser 等中文解析器, 或基于 pg_trgm/pg_bigm 的索引
+    async def run() -> None:
+        await RawTable.raw(
+            "ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            "GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(content, '')), 'B')"
+            ") STORED;"
+        )
+        await RawTable.raw(
+            "CREATE INDEX IF NOT EXISTS posts_search_vector_idx "
+            "ON posts USING GIN (search_vector);"
+        )
+
+    async def run_backwards() -> None:
+        await RawTable.raw("DROP INDEX IF EXISTS posts_search_vector_idx;")
+        await RawTable.raw("ALTER TABLE posts DROP COLUMN IF EXISTS search_vector;")
+
+    manager.add_raw(run)
+    manager.add_raw_backwards(run_backwards)
+
+    return manager
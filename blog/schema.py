@@ -0,0 +1,67 @@
+import typing as t
+from datetime import datetime
+from uuid import UUID
+from msgspec import Meta, Struct
+
+
+# 只包含标量字段或同样关闭 GC 跟踪的 Struct, 不会形成引用环, 可以关闭 GC 跟踪
+class AuthorSummary(Struct, gc=False):
+    id: UUID
+    username: str
+    nickname: t.Optional[str]
+
+
+class PostSummary(Struct, gc=False):
+    id: UUID
+    title: str
+    excerpt: str
+    author: t.Optional[AuthorSummary]
+    created_at: datetime
+    updated_at: t.Optional[datetime]
+
+
+class PostDetail(Struct, gc=False):
+    id: UUID
+    title: str
+    content: str
+    excerpt: str
+    author: t.Optional[AuthorSummary]
+    created_at: datetime
+    updated_at: t.Optional[datetime]
+
+
+class PostSearchHit(Struct, gc=False):
+    id: UUID
+    title: str
+    excerpt: str
+    author: t.Optional[AuthorSummary]
+    created_at: datetime
+    updated_at: t.Optional[datetime]
+    rank: float
+    # 正文中匹配片段, 关键词以 <b></b> 包裹
+    headline: str
+
+
+class PostInput(Struct):
+    title: str
+    content: str
+    # 迁移旧文章时可保留原发布时间, 默认为写入时间
+    created_at: t.Optional[datetime] = None
+
+
+class BulkPostsInput(Struct):
+    max_body_size: t.ClassVar[int] = 64 * 1024 * 1024
+
+    posts: t.Annotated[list[PostInput], Meta(min_length=1)]
+    # True: 任意一篇失败则全部不写入; False: 写入其余文章并逐条报告失败
+    atomic: bool = True
+
+
+class BulkPostError(Struct, gc=False):
+    index: int
+    message: str
+
+
+class BulkPostsResult(Struct):
+    created: list[UUID]
+    errors: list[BulkPostError]
@@ -1,21 +1,64 @@
-from datetime import datetime
+import re
+import typing as t
+from datetime import datetime, timezone
+from uuid import UUID
+from asyncpg import Connection, PostgresError
 from piccolo.table import Table
 from piccolo.columns import Varchar, Text, Timestamptz, ForeignKey
-from utils.column_types import UUID as UUIDv7
+from app.settings import load_settings
+from blog.schema import BulkPostError, BulkPostsResult, PostInput
+from utils.column_types import UUID as UUIDv7, UUID7
+from utils.counts import get_count_service
+from utils.db_replicas import get_replica_router
+from utils.response_cache import get_response_cache
 from user.tables import User
 
+BULK_INSERT = load_settings().bulk_insert
+BULK_COLUMNS = ("id", "title", "content", "excerpt", "author", "created_at")
+# 多行 INSERT: 参数个数固定为列数, 与行数无关, 预处理语句可以被缓存
+BULK_INSERT_SQL = (
+    f"INSERT INTO posts ({', '.join(BULK_COLUMNS)}) "
+    "SELECT * FROM unnest("
+    "$1::uuid[], $2::varchar[], $3::text[], $4::varchar[], $5::uuid[], "
+    "$6::timestamptz[])"
+)
+
+BulkRow = tuple[UUID, str, str, str, UUID, datetime]
+
 
 class Posts(Table):
+    # (created_at, id) 上的复合索引由迁移 2026-10-18T09:12:41:305118 创建, 用于 keyset 分页
+    # 全文搜索使用的 search_vector 生成列及其 GIN 索引由迁移 2026-10-18T10:21:05:441907 创建
     id = UUIDv7(primary_key=True, required=True)
     title = Varchar(length=100)
     content = Text()
+    # 列表接口只读取摘要, 正文仅在详情接口中返回; 由写入路径维护
+    excerpt = Varchar(length=255, default="")
     author = ForeignKey(references=User)
     created_at = Timestamptz()
     updated_at = Timestamptz(required=False, null=True, auto_update=datetime.now)
 
+    _excerpt_length = 200
+    _whitespace = re.compile(r"\s+")
+    # 必须与 search_vector 生成列使用的配置一致.
+    # 'simple' 只适合按空格/标点分词的文本 (如英文): 连续的中文字符会被解析为一个词元,
+    # 无法搜索句子中的单个中文词
+    _search_config = "simple"
+    _headline_options = "MaxFragments=2, MaxWords=30, MinWords=10"
+
     def __str__(self) -> str:
         return self.title
 
+    @classmethod
+    def make_excerpt(cls, content: str) -> str:
+        """
+        生成摘要: 合并空白字符后截取前 ``_excerpt_length`` 个字符
+        """
+        text = cls._whitespace.sub(" ", content).strip()
+        if len(text) <= cls._excerpt_length:
+            return text
+        return text[: cls._excerpt_length - 1] + "…"
+
     @classmethod
     async def create_posts(cls, title: str, content: str, author: User) -> "Posts":
         """创建文章
@@ -28,8 +71,189 @@ class Posts(Table):
         Returns:
             Posts: Posts实例
         """
-        return await cls.objects().create(
+        post = await cls.objects().create(
             title=title,
             content=content,
+            excerpt=cls.make_excerpt(content),
             author=author,
         )
+        get_replica_router().pin(author.id)
+        get_count_service().adjust(cls, 1)
+        get_response_cache().invalidate()
+        return post
+
+    @classmethod
+    async def update_posts(
+        cls,
+        post_id: UUID,
+        title: t.Optional[str] = None,
+        content: t.Optional[str] = None,
+    ) -> None:
+        """更新文章, 修改正文时同步更新摘要
+
+        Args:
+            post_id (UUID): 文章ID
+            title (str, optional): 新标题
+            content (str, optional): 新正文
+        """
+        values: t.Dict[t.Any, t.Any] = {}
+        if title is not None:
+            values[cls.title] = title
+        if content is not None:
+            values[cls.content] = content
+            values[cls.excerpt] = cls.make_excerpt(content)
+        if not values:
+            return
+        await cls.update(values).where(cls.id == post_id)
+        get_response_cache().invalidate()
+
+    @classmethod
+    async def search(
+        cls,
+        terms: str,
+        limit: int,
+        after: t.Optional[tuple[float, UUID]] = None,
+        node: t.Optional[str] = None,
+    ) -> list[dict[str, t.Any]]:
+        """全文搜索, 按 (rank, id) 倒序返回
+
+        匹配通过 GIN 索引完成; ``ts_headline`` 需要读取正文, 代价较高,
+        因此只对分页后的结果计算.
+        中文内容只能按整段连续文字匹配, 见 ``_search_config``.
+
+        Args:
+            terms (str): 搜索词, 支持 websearch 语法 (引号短语, ``or``, ``-排除``)
+            limit (int): 最多返回的行数
+            after (tuple, optional): 上一页最后一行的 (rank, id)
+            node (str, optional): 执行查询的数据库节点
+
+        Returns:
+            list: 包含摘要字段, 作者列, ``rank`` 与 ``headline`` 的行
+        """
+        args: list[t.Any] = [terms]
+        keyset = ""
+        if after is not None:
+            keyset = "AND (ts_rank(p.search_vector, q.query), p.id) < ({}::real, {}) "
+            args.extend(after)
+        args.append(limit)
+        return await cls.raw(
+            "WITH q AS (SELECT websearch_to_tsquery("
+            f"'{cls._search_config}', {{}}) AS query), "
+            "page AS ("
+            "SELECT p.id, ts_rank(p.search_vector, q.query) AS rank "
+            "FROM posts p, q WHERE p.search_vector @@ q.query "
+            f"{keyset}"
+            "ORDER BY rank DESC, p.id DESC LIMIT {}"
+            ") "
+            "SELECT p.id, p.title, p.excerpt, p.author, "
+            "u.username AS author_username, u.nickname AS author_nickname, "
+            "p.created_at, p.updated_at, page.rank, "
+            f"ts_headline('{cls._search_config}', p.content, q.query, "
+            f"'{cls._headline_options}') AS headline "
+            "FROM page JOIN posts p ON p.id = page.id CROSS JOIN q "
+            "LEFT JOIN auth_user u ON u.id = p.author "
+            "ORDER BY page.rank DESC, page.id DESC",
+            *args,
+        ).run(node=node)
+
+    @classmethod
+    def _validate_post(cls, post: PostInput) -> t.Optional[str]:
+        title = post.title.strip()
+        if not title:
+            return "Title cannot be empty."
+        if len(title) > cls.title.length:
+            return f"Title must be at most {cls.title.length} characters."
+        if post.created_at is not None and post.created_at.tzinfo is None:
+            return "created_at must include a timezone."
+        return None
+
+    @classmethod
+    async def _insert_chunk(cls, connection: Connection, rows: list[BulkRow]) -> None:
+        if len(rows) >= BULK_INSERT.copy_threshold:
+            await connection.copy_records_to_table(
+                cls._meta.tablename, records=rows, columns=BULK_COLUMNS
+            )
+        else:
+            await connection.execute(
+                BULK_INSERT_SQL, *(list(column) for column in zip(*rows))
+            )
+
+    @classmethod
+    async def bulk_create(
+        cls, posts: t.Sequence[PostInput], author_id: UUID, atomic: bool = True
+    ) -> BulkPostsResult:
+        """批量创建文章, 每个分块一次往返 (多行 INSERT 或 COPY)
+
+        id 在客户端按输入顺序生成 (UUIDv7), 因此 COPY 也无需 RETURNING.
+
+        Args:
+            posts (Sequence[PostInput]): 待创建的文章
+            author_id (UUID): 作者
+            atomic (bool): True 时任意一篇失败则全部回滚;
+                False 时每个分块独立提交, 失败分块中的文章逐条报告
+
+        Returns:
+            BulkPostsResult: 成功创建的 id 与失败文章的下标及原因
+        """
+        errors: list[BulkPostError] = []
+        indexes: list[int] = []
+        rows: list[BulkRow] = []
+        now = datetime.now(tz=timezone.utc)
+        id_default = UUID7()
+        for index, post in enumerate(posts):
+            message = cls._validate_post(post)
+            if message is not None:
+                errors.append(BulkPostError(index=index, message=message))
+                continue
+            indexes.append(index)
+            rows.append(
+                (
+                    id_default.python(),
+                    post.title.strip(),
+                    post.content,
+                    cls.make_excerpt(post.content),
+                    author_id,
+                    post.created_at or now,
+                )
+            )
+        if not rows or (errors and atomic):
+            return BulkPostsResult(created=[], errors=errors)
+
+        size = BULK_INSERT.chunk_size
+        chunks = [
+            (indexes[start : start + size], rows[start : start + size])
+            for start in range(0, len(rows), size)
+        ]
+        created: list[UUID] = []
+        async with cls._meta.db.pool.acquire() as connection:
+            if atomic:
+                chunk_indexes: list[int] = []
+                try:
+                    async with connection.transaction():
+                        for chunk_indexes, chunk in chunks:
+                            await cls._insert_chunk(connection, chunk)
+                except PostgresError as e:
+                    errors.extend(
+                        BulkPostError(index=index, message=str(e))
+                        for index in chunk_indexes
+                    )
+                    return BulkPostsResult(created=[], errors=errors)
+                created = [row[0] for row in rows]
+            else:
+                for chunk_indexes, chunk in chunks:
+                    try:
+                        async with connection.transaction():
+                            await cls._insert_chunk(connection, chunk)
+                    except PostgresError as e:
+                        errors.extend(
+                            BulkPostError(index=index, message=str(e))
+                            for index in chunk_indexes
+                        )
+                        continue
+                    created.extend(row[0] for row in chunk)
+
+        if created:
+            get_replica_router().pin(author_id)
+            get_count_service().adjust(cls, len(created))
+            get_response_cache().invalidate()
+        return BulkPostsResult(created=created, errors=errors)
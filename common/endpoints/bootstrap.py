@@ -5,6 +5,10 @@ from user.tables import User
 from blacksheep.exceptions import Forbidden
 
 from utils.bindings import FromSchema
+from utils.bootstrap import BOOTSTRAP_LATCH
+from utils.singleflight import SingleFlight
+
+USER_EXISTS_INFLIGHT: SingleFlight[bool] = SingleFlight()
 
 
 class BoostrapAPI(APIController):
@@ -18,7 +22,10 @@ class BoostrapAPI(APIController):
         return "bootstrap"
 
     async def on_request(self, request: Request) -> None:
-        if await User.exists():
+        # 存在用户后直接拒绝, 不再访问数据库
+        if BOOTSTRAP_LATCH.users_exist or await BOOTSTRAP_LATCH.refresh(
+            lambda: USER_EXISTS_INFLIGHT.do("exists", lambda: User.exists().run())
+        ):
             raise Forbidden("Bootstrap API can only be accessed when no users exist.")
 
     @get("/")
@@ -37,6 +44,7 @@ class BoostrapAPI(APIController):
             password=data.password,
             email=data.email,
             nickname=data.nickname,
+            superuser=True,
         )
         # TODO: 重定向到登录页面
         return self.created(location="l")
@@ -0,0 +1,25 @@
+from blacksheep import Response, auth
+from blacksheep.server.controllers import APIController, get
+
+from utils.metrics import collect_metrics
+from utils.responses import ApiResponse, StatusCode, jsonify
+
+
+class MetricsAPI(APIController):
+    """
+    内部运行指标, 仅超级管理员可访问
+    """
+
+    @classmethod
+    def route(cls) -> str:
+        return "internal"
+
+    @auth("superuser")
+    @get("/metrics")
+    async def get_metrics(self) -> Response:
+        """
+        数据库连接池, 密码哈希线程池与认证失败统计
+        """
+        return jsonify(
+            data=ApiResponse(code=StatusCode.SUCCESS, data=collect_metrics())
+        )
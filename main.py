@@ -1,7 +1,16 @@
 if __name__ == "__main__":
 
+    import os
+    import sys
+
     import uvicorn
 
+    # 通过环境变量传递, reload 模式下的子进程同样生效
+    if "--skip-migrations" in sys.argv:
+        os.environ["NAZO_MIGRATIONS"] = "skip"
+    elif "--verify-migrations" in sys.argv:
+        os.environ["NAZO_MIGRATIONS"] = "verify"
+
     uvicorn.run(
         "app.main:app",
         reload=True,
@@ -1,18 +1,31 @@
-from piccolo.engine.postgres import PostgresEngine
-
 from piccolo.conf.apps import AppRegistry
 
 from app.settings import load_settings
+from utils.db_pool import InstrumentedPostgresEngine
 
 settings = load_settings().database
-DB = PostgresEngine(
+DB = InstrumentedPostgresEngine(
     config={
         "database": settings.database,
         "user": settings.user,
         "password": settings.password,
         "host": settings.host,
         "port": settings.port,
-    }
+    },
+    pool_options=settings.pool.options(),
+    extra_nodes={
+        f"replica_{index}": InstrumentedPostgresEngine(
+            config={
+                "database": replica.database or settings.database,
+                "user": replica.user or settings.user,
+                "password": replica.password or settings.password,
+                "host": replica.host,
+                "port": replica.port,
+            },
+            pool_options=settings.pool.options(),
+        )
+        for index, replica in enumerate(settings.replicas.nodes)
+    },
 )
 
 APP_REGISTRY = AppRegistry(apps=["user.piccolo_app", "blog.piccolo_app"])
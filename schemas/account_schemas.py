@@ -22,6 +22,8 @@ UsernameType = t.Annotated[
 
 
 class RegisterInput(Struct):
+    max_body_size: t.ClassVar[int] = 4 * 1024
+
     username: UsernameType
     password: t.Annotated[str, Meta(min_length=6, max_length=128)]
     nickname: str
@@ -0,0 +1,116 @@
+import asyncio
+import typing as t
+from time import time
+from unittest import mock
+
+import pytest
+from uuid_utils.compat import uuid7
+
+from app.auth import JWTAuthHandler
+from app.settings import load_settings
+from user.schema import Principal
+from user.tables import User
+from utils.token import TokenPayload
+
+BURST = 50
+
+
+def make_handler() -> tuple[JWTAuthHandler, str, t.Any]:
+    handler = JWTAuthHandler(settings=load_settings())
+    user_id = uuid7()
+    token = handler.jwt_service.generate_jwt(TokenPayload(sub=user_id))
+    return handler, token, user_id
+
+
+def make_principal(user_id: t.Any) -> Principal:
+    return Principal(
+        id=user_id,
+        username="burst",
+        email="burst@example.com",
+        nickname=None,
+        active=True,
+        admin=False,
+        superuser=False,
+        version=int(time()),
+    )
+
+
+class SlowLoader:
+    """
+    替代 ``User.load_principal``: 记录调用次数, 并在返回前等待 ``release``,
+    保证突发请求全部到达时查询仍未完成
+    """
+
+    def __init__(self, result: t.Any = None, error: t.Optional[Exception] = None):
+        self.calls = 0
+        self.result = result
+        self.error = error
+        self.release = asyncio.Event()
+
+    async def __call__(self, user_id: t.Any, node: t.Optional[str] = None) -> t.Any:
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+async def _burst(handler: JWTAuthHandler, token: str, loader: SlowLoader) -> list:
+    tasks = [asyncio.create_task(handler.decode_token(token)) for _ in range(BURST)]
+    await asyncio.sleep(0)
+    loader.release.set()
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def test_burst_issues_one_query() -> None:
+    async def run() -> None:
+        handler, token, user_id = make_handler()
+        loader = SlowLoader(result=make_principal(user_id))
+        with mock.patch.object(User, "load_principal", loader):
+            results = await _burst(handler, token, loader)
+            # 之后的请求命中本地缓存
+            again = await handler.decode_token(token)
+
+        assert loader.calls == 1
+        assert all(result is results[0] for result in results)
+        assert again is results[0]
+        assert results[0].account.id == user_id
+
+    asyncio.run(run())
+
+
+def test_error_reaches_every_waiter() -> None:
+    async def run() -> None:
+        handler, token, _ = make_handler()
+        loader = SlowLoader(error=RuntimeError("database unavailable"))
+        with mock.patch.object(User, "load_principal", loader):
+            results = await _burst(handler, token, loader)
+
+        assert loader.calls == 1
+        assert len(results) == BURST
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiter_does_not_cancel_shared_call() -> None:
+    async def run() -> None:
+        handler, token, user_id = make_handler()
+        loader = SlowLoader(result=make_principal(user_id))
+        with mock.patch.object(User, "load_principal", loader):
+            first = asyncio.create_task(handler.decode_token(token))
+            others = [
+                asyncio.create_task(handler.decode_token(token)) for _ in range(3)
+            ]
+            await asyncio.sleep(0)
+            first.cancel()
+            await asyncio.sleep(0)
+            loader.release.set()
+            results = await asyncio.gather(*others)
+
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert loader.calls == 1
+        assert all(result.account.id == user_id for result in results)
+
+    asyncio.run(run())
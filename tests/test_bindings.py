@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+from blacksheep import Content, Request, StreamedContent
+
+from user.schema import LoginInput
+from utils.bindings import PayloadTooLarge, SchemaBinder, read_limited
+
+LOGIN = b'{"username": "admin", "password": "secret"}'
+
+
+def make_request(content: Content) -> Request:
+    request = Request("POST", b"/users/login", [(b"Content-Type", content.type)])
+    request.content = content
+    return request
+
+
+def streamed(*chunks: bytes) -> StreamedContent:
+    async def generator():
+        for chunk in chunks:
+            yield chunk
+
+    return StreamedContent(b"application/json", generator)
+
+
+def test_buffered_body_is_used_directly():
+    # TestClient 与中间件替换后的请求体已经完整缓冲, 没有可读取的流
+    request = make_request(Content(b"application/json", LOGIN))
+
+    assert asyncio.run(read_limited(request, 1024)) == LOGIN
+
+
+def test_buffered_body_over_limit():
+    request = make_request(Content(b"application/json", LOGIN))
+
+    with pytest.raises(PayloadTooLarge):
+        asyncio.run(read_limited(request, len(LOGIN) - 1))
+
+
+def test_streamed_body_is_read_in_chunks():
+    request = make_request(streamed(LOGIN[:10], b"", LOGIN[10:]))
+
+    assert asyncio.run(read_limited(request, 1024)) == LOGIN
+
+
+def test_streamed_body_over_limit():
+    request = make_request(streamed(LOGIN, LOGIN))
+
+    with pytest.raises(PayloadTooLarge):
+        asyncio.run(read_limited(request, len(LOGIN) + 1))
+
+
+def test_schema_binder_decodes_buffered_body():
+    binder = SchemaBinder(LoginInput)
+    request = make_request(Content(b"application/json", LOGIN))
+
+    value = asyncio.run(binder.get_value(request))
+
+    assert value == LoginInput(username="admin", password="secret")
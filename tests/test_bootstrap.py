@@ -0,0 +1,62 @@
+import asyncio
+from unittest import mock
+
+from guardpost.authorization import AuthorizationContext
+
+from app.auth import SuperuserRequirement
+from user.schema import Principal
+from user.tables import User
+from utils.bootstrap import BOOTSTRAP_LATCH
+from utils.identity import UserIdentity
+
+
+def superuser_allowed(identity: UserIdentity) -> bool:
+    requirement = SuperuserRequirement()
+    context = AuthorizationContext(identity, [requirement])
+    requirement.handle(context)
+    return context.has_succeeded
+
+
+def identity_for(user: User) -> UserIdentity:
+    principal = {
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "nickname": user.nickname,
+        "active": user.active,
+        "admin": user.admin,
+        "superuser": user.superuser,
+    }
+    return UserIdentity(
+        claims={"account": Principal(**principal, version=0)},
+        authentication_mode="JWT Bearer",
+    )
+
+
+def create(**kwargs: object) -> User:
+    async def save(self: User) -> None:
+        return None
+
+    with mock.patch.object(User, "save", save), mock.patch.object(
+        BOOTSTRAP_LATCH, "close"
+    ):
+        return asyncio.run(
+            User.create_user(
+                username="root",
+                password="correct horse",
+                email="root@example.com",
+                **kwargs,
+            )
+        )
+
+
+def test_bootstrap_account_can_reach_superuser_routes() -> None:
+    user = create(superuser=True)
+    assert user.superuser and user.admin and user.active
+    assert superuser_allowed(identity_for(user))
+
+
+def test_regular_account_is_not_superuser() -> None:
+    user = create()
+    assert not user.superuser and not user.admin
+    assert not superuser_allowed(identity_for(user))
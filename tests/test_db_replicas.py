@@ -0,0 +1,130 @@
+import asyncio
+import typing as t
+from contextlib import asynccontextmanager
+
+from app.settings import Replicas
+from utils.db_replicas import ReplicaRouter
+
+
+class FakeConnection:
+    def __init__(self, engine: "FakeEngine") -> None:
+        self.engine = engine
+
+    async def fetchval(self, query: str) -> t.Any:
+        if self.engine.query_error is not None:
+            raise self.engine.query_error
+        return self.engine.lag
+
+
+class FakePool:
+    def __init__(self, engine: "FakeEngine") -> None:
+        self.engine = engine
+
+    @asynccontextmanager
+    async def acquire(self) -> t.AsyncIterator[FakeConnection]:
+        yield FakeConnection(self.engine)
+
+
+class FakeEngine:
+    """
+    只实现 ReplicaRouter 用到的部分: ``pool``, 启动与关闭连接池
+    """
+
+    def __init__(self, start_error: t.Optional[Exception] = None) -> None:
+        self.pool: t.Optional[FakePool] = None
+        self.start_error = start_error
+        self.query_error: t.Optional[Exception] = None
+        self.lag = 0.0
+
+    async def start_connection_pool(self) -> None:
+        if self.start_error is not None:
+            raise self.start_error
+        self.pool = FakePool(self)
+
+    async def close_connection_pool(self) -> None:
+        self.pool = None
+
+
+def make_router(nodes: dict[str, FakeEngine], **settings: t.Any) -> ReplicaRouter:
+    return ReplicaRouter(Replicas(**settings), t.cast(t.Any, nodes))
+
+
+def test_failed_replica_is_not_routed() -> None:
+    async def run() -> None:
+        nodes = {
+            "broken": FakeEngine(start_error=OSError("connection refused")),
+            "healthy": FakeEngine(),
+        }
+        router = make_router(nodes)
+        await router.start()
+        try:
+            # 前一个副本启动失败不影响后面的副本
+            assert nodes["healthy"].pool is not None
+            assert {router.read_node() for _ in range(4)} == {"healthy"}
+            assert [s.available for s in router.stats()] == [False, True]
+        finally:
+            await router.close()
+        assert router.read_node() is None
+
+    asyncio.run(run())
+
+
+def test_reads_stay_on_primary_when_no_replica_starts() -> None:
+    async def run() -> None:
+        router = make_router({"broken": FakeEngine(start_error=OSError("down"))})
+        await router.start()
+        try:
+            assert router.read_node() is None
+        finally:
+            await router.close()
+
+    asyncio.run(run())
+
+
+def test_health_check_runs_without_max_lag() -> None:
+    async def run() -> None:
+        replica = FakeEngine()
+        router = make_router({"replica": replica}, max_lag=0)
+        await router.refresh()
+        assert router.read_node() == "replica"
+
+        replica.query_error = OSError("connection lost")
+        await router.refresh()
+        assert router.read_node() is None
+
+        replica.query_error = None
+        await router.refresh()
+        assert router.read_node() == "replica"
+
+    asyncio.run(run())
+
+
+def test_failed_replica_rejoins_after_recovery() -> None:
+    async def run() -> None:
+        replica = FakeEngine(start_error=OSError("down"))
+        router = make_router({"replica": replica})
+        await router.refresh()
+        assert router.read_node() is None
+
+        replica.start_error = None
+        await router.refresh()
+        assert replica.pool is not None
+        assert router.read_node() == "replica"
+
+    asyncio.run(run())
+
+
+def test_lagging_replica_is_skipped() -> None:
+    async def run() -> None:
+        replica = FakeEngine()
+        router = make_router({"replica": replica}, max_lag=1.0)
+        replica.lag = 5.0
+        await router.refresh()
+        assert router.read_node() is None
+        assert router.stats()[0].lag == 5.0
+
+        replica.lag = 0.5
+        await router.refresh()
+        assert router.read_node() == "replica"
+
+    asyncio.run(run())
@@ -0,0 +1,290 @@
+import asyncio
+import typing as t
+from multiprocessing import shared_memory
+from time import time
+from unittest import mock
+from uuid import uuid4
+
+import pytest
+from blacksheep.exceptions import Forbidden
+from uuid_utils.compat import uuid7
+
+from app.auth import JWTAuthHandler
+from app.settings import AuthCache, load_settings
+from user.schema import Principal
+from user.tables import User
+from utils.identity_cache import (
+    CacheBackend,
+    IdentityCache,
+    RedisBackend,
+    SharedMemoryBackend,
+)
+from utils.token import TokenPayload
+
+SETTINGS = AuthCache(local_ttl=300)
+MAX_TOKEN_TTL = 3600
+
+
+def make_cache(backend: t.Optional[CacheBackend] = None) -> IdentityCache:
+    return IdentityCache(SETTINGS, backend, max_token_ttl=MAX_TOKEN_TTL)
+
+
+def make_principal(user_id: t.Any, version: float, revoked_at: int = 0) -> Principal:
+    return Principal(
+        id=user_id,
+        username="worker",
+        email="worker@example.com",
+        nickname=None,
+        active=True,
+        admin=False,
+        superuser=False,
+        version=int(version),
+        revoked_at=revoked_at,
+    )
+
+
+@pytest.fixture
+def shm_name() -> t.Iterator[str]:
+    name = f"nazo_test_{uuid4().hex[:12]}"
+    yield name
+    shm = shared_memory.SharedMemory(name)
+    shm.close()
+    shm.unlink()
+
+
+class RespStandIn:
+    """
+    只实现 RedisBackend 所需命令 (MGET/SET PX/DEL) 与连接握手的 RESP 服务,
+    代替真实的 Redis
+    """
+
+    def __init__(self) -> None:
+        self.data: dict[bytes, tuple[bytes, float]] = {}
+        self.server: t.Optional[asyncio.AbstractServer] = None
+
+    @property
+    def url(self) -> str:
+        assert self.server is not None
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"redis://{host}:{port}/0"
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+
+    async def stop(self) -> None:
+        assert self.server is not None
+        self.server.close()
+        await self.server.wait_closed()
+
+    def _get(self, key: bytes) -> t.Optional[bytes]:
+        item = self.data.get(key)
+        if item is None or item[1] <= time():
+            return None
+        return item[0]
+
+    def _execute(self, command: list[bytes]) -> bytes:
+        name, args = command[0].upper(), command[1:]
+        if name == b"MGET":
+            values = [self._get(key) for key in args]
+            return b"*%d\r\n" % len(values) + b"".join(
+                b"_\r\n" if v is None else b"$%d\r\n%s\r\n" % (len(v), v)
+                for v in values
+            )
+        if name == b"SET" and len(args) == 4 and args[2].upper() == b"PX":
+            self.data[args[0]] = (args[1], time() + int(args[3]) / 1000)
+            return b"+OK\r\n"
+        if name == b"DEL":
+            return b":%d\r\n" % sum(self.data.pop(k, None) is not None for k in args)
+        if name == b"PING":
+            return b"+PONG\r\n"
+        if name == b"HELLO":
+            # redis-py 连接时协商 RESP3, 因此 MGET 中的空值使用 RESP3 的 null
+            return b"%1\r\n$5\r\nproto\r\n:3\r\n"
+        if name == b"CLIENT":
+            return b"+OK\r\n"
+        return b"-ERR unknown command\r\n"
+
+    async def _serve(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while line := await reader.readline():
+                command = []
+                for _ in range(int(line[1:])):
+                    size = int((await reader.readline())[1:])
+                    command.append((await reader.readexactly(size + 2))[:-2])
+                writer.write(self._execute(command))
+                await writer.drain()
+        finally:
+            writer.close()
+
+
+def test_invalidate_user_evicts_local_entries() -> None:
+    async def run() -> None:
+        cache = make_cache()
+        user_id, digest = uuid7(), b"d" * 16
+        await cache.set("jti", user_id, digest, time() + 60, "identity")
+        assert cache.get_local("jti", digest) == "identity"
+
+        revoked_at = int(time() * 1000)
+        await cache.invalidate_user(user_id, revoked_at)
+
+        assert cache.get_local("jti", digest) is None
+        assert cache.is_revoked(user_id, revoked_at - 1)
+        assert not cache.is_revoked(user_id, revoked_at + 1)
+
+    asyncio.run(run())
+
+
+def test_local_entry_expires_with_loaded_principal() -> None:
+    async def run() -> None:
+        cache = make_cache()
+        stale = time() - SETTINGS.local_ttl - 1
+        await cache.set("jti", uuid7(), b"d" * 16, time() + 60, "id", loaded_at=stale)
+
+        assert cache.get_local("jti", b"d" * 16) is None
+        assert not cache.is_fresh(stale)
+        assert cache.is_fresh(time())
+
+    asyncio.run(run())
+
+
+def test_shm_backend_roundtrip(shm_name: str) -> None:
+    async def run() -> None:
+        backend = SharedMemoryBackend(shm_name, slots=64)
+        await backend.set("a", b"value", ttl=60)
+        await backend.set("expired", b"value", ttl=-1)
+        assert await backend.get_many(["a", "missing", "expired"]) == [
+            b"value",
+            None,
+            None,
+        ]
+        await backend.delete("a")
+        assert await backend.get_many(["a"]) == [None]
+        await backend.close()
+
+    asyncio.run(run())
+
+
+def test_shm_revocation_reaches_other_worker(shm_name: str) -> None:
+    async def run() -> None:
+        worker_a = make_cache(SharedMemoryBackend(shm_name, slots=64))
+        worker_b = make_cache(SharedMemoryBackend(shm_name, slots=64))
+        user_id, digest = uuid7(), b"d" * 16
+        await worker_a.set(
+            "jti", user_id, digest, time() + 60, "identity", shared_value=b"claims"
+        )
+        assert await worker_b.lookup_shared("jti", user_id, digest) == (b"claims", 0)
+
+        revoked_at = int(time() * 1000)
+        await worker_a.invalidate_user(user_id, revoked_at)
+
+        _, seen = await worker_b.lookup_shared("jti", user_id, digest)
+        assert seen == revoked_at
+        # 摘要不同的 token 不会命中共享条目
+        assert await worker_b.lookup_shared("jti", user_id, b"x" * 16) == (
+            None,
+            revoked_at,
+        )
+        await worker_a.close()
+        await worker_b.close()
+
+    asyncio.run(run())
+
+
+def test_redis_revocation_reaches_other_worker() -> None:
+    pytest.importorskip("redis")
+
+    async def run() -> None:
+        server = RespStandIn()
+        await server.start()
+        try:
+            worker_a = make_cache(RedisBackend(server.url))
+            worker_b = make_cache(RedisBackend(server.url))
+            user_id, digest = uuid7(), b"d" * 16
+            await worker_a.set(
+                "jti", user_id, digest, time() + 60, "id", shared_value=b"claims"
+            )
+            assert await worker_b.lookup_shared("jti", user_id, digest) == (
+                b"claims",
+                0,
+            )
+
+            revoked_at = int(time() * 1000)
+            await worker_a.invalidate_user(user_id, revoked_at)
+
+            _, seen = await worker_b.lookup_shared("jti", user_id, digest)
+            assert seen == revoked_at
+            await worker_a.backend.delete(worker_a.token_prefix + "jti")
+            assert await worker_b.lookup_shared("jti", user_id, digest) == (
+                None,
+                revoked_at,
+            )
+            await worker_a.close()
+            await worker_b.close()
+        finally:
+            await server.stop()
+
+    asyncio.run(run())
+
+
+def test_lost_revocation_marker_falls_back_to_database(shm_name: str) -> None:
+    """
+    共享层的吊销标记被其他条目覆盖后, 旧 token 最多在 ``local_ttl`` 内仍被接受,
+    之后从数据库读取到的吊销时间会拒绝它
+    """
+
+    def make_handler() -> JWTAuthHandler:
+        handler = JWTAuthHandler(settings=load_settings())
+        handler.cache = make_cache(SharedMemoryBackend(shm_name, slots=64))
+        return handler
+
+    async def run() -> None:
+        worker_a, worker_b = make_handler(), make_handler()
+        user_id = uuid7()
+        token = worker_a.jwt_service.generate_jwt(TokenPayload(sub=user_id))
+        # worker A 在 local_ttl 之前加载了用户信息, 并写入共享层
+        loaded = time() - SETTINGS.local_ttl - 1
+        load = mock.AsyncMock(return_value=make_principal(user_id, loaded))
+        with mock.patch.object(User, "load_principal", load):
+            await worker_a.decode_token(token)
+
+        # 修改密码后发布的吊销标记随后被覆盖
+        revoked_at = int(time() * 1000)
+        await worker_a.cache.invalidate_user(user_id, revoked_at)
+        await worker_a.cache.backend.delete(worker_a.cache.revoke_prefix + str(user_id))
+
+        reload = mock.AsyncMock(
+            return_value=make_principal(user_id, time(), revoked_at)
+        )
+        with mock.patch.object(User, "load_principal", reload):
+            with pytest.raises(Forbidden):
+                await worker_b.decode_token(token)
+        assert reload.await_count == 1
+        await worker_a.cache.close()
+        await worker_b.cache.close()
+
+    asyncio.run(run())
+
+
+def test_fresh_shared_entry_skips_database(shm_name: str) -> None:
+    def make_handler() -> JWTAuthHandler:
+        handler = JWTAuthHandler(settings=load_settings())
+        handler.cache = make_cache(SharedMemoryBackend(shm_name, slots=64))
+        return handler
+
+    async def run() -> None:
+        worker_a, worker_b = make_handler(), make_handler()
+        user_id = uuid7()
+        token = worker_a.jwt_service.generate_jwt(TokenPayload(sub=user_id))
+        load = mock.AsyncMock(return_value=make_principal(user_id, time()))
+        with mock.patch.object(User, "load_principal", load):
+            await worker_a.decode_token(token)
+            identity = await worker_b.decode_token(token)
+
+        assert load.await_count == 1
+        assert identity.account.id == user_id
+        await worker_a.cache.close()
+        await worker_b.cache.close()
+
+    asyncio.run(run())
@@ -0,0 +1,200 @@
+import json
+import typing as t
+from pathlib import Path
+from time import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from uuid_utils.compat import uuid7
+
+from utils.jws import JWTCodec, b64url_decode, b64url_encode
+from utils.keyring import KeyRing, SigningKey, key_id
+from utils.token import TokenPayload
+
+ISSUER = "nazo-test"
+
+
+@pytest.fixture
+def keyring(tmp_path: Path) -> KeyRing:
+    return KeyRing(secret_dir=tmp_path)
+
+
+@pytest.fixture
+def codec(keyring: KeyRing) -> JWTCodec:
+    return JWTCodec(keyring=keyring, issuer=ISSUER)
+
+
+def claims(**overrides: t.Any) -> dict[str, t.Any]:
+    now = int(time())
+    values: dict[str, t.Any] = {
+        "sub": str(uuid7()),
+        "iss": ISSUER,
+        "exp": now + 3600,
+        "iat": now,
+        "jti": str(uuid7()),
+    }
+    values.update(overrides)
+    return {name: value for name, value in values.items() if value is not None}
+
+
+def pyjwt_encode(key: SigningKey, payload: dict[str, t.Any], **headers: t.Any) -> str:
+    return jwt.encode(
+        payload,
+        key.private_key,
+        algorithm="EdDSA",
+        headers={"kid": key.kid, **headers},
+    )
+
+
+def pyjwt_decode(key: SigningKey, token: str) -> dict[str, t.Any]:
+    """
+    与切换前 ``JWTService.verify_jwt`` 相同的 PyJWT 参数
+    """
+    return jwt.decode(
+        token,
+        key.public_key,
+        algorithms=["EdDSA"],
+        issuer=ISSUER,
+        options={"require": ["exp", "iss", "sub"]},
+    )
+
+
+def test_decodes_pyjwt_token(codec: JWTCodec, keyring: KeyRing) -> None:
+    payload = claims()
+    decoded = codec.decode(pyjwt_encode(keyring.active, payload))
+    assert str(decoded.sub) == payload["sub"]
+    assert decoded.iss == ISSUER
+    assert decoded.exp == payload["exp"]
+    assert decoded.iat == payload["iat"]
+    assert str(decoded.jti) == payload["jti"]
+
+
+def test_decodes_pyjwt_token_without_kid(codec: JWTCodec, keyring: KeyRing) -> None:
+    # 轮换前签发的 token 没有 kid
+    token = jwt.encode(claims(), keyring.active.private_key, algorithm="EdDSA")
+    assert codec.decode(token).iss == ISSUER
+
+
+def test_pyjwt_decodes_codec_token(codec: JWTCodec, keyring: KeyRing) -> None:
+    payload = TokenPayload(sub=uuid7(), iss=ISSUER)
+    token = codec.encode(payload)
+    decoded = pyjwt_decode(keyring.active, token)
+    assert decoded == {
+        "sub": str(payload.sub),
+        "iss": ISSUER,
+        "exp": payload.exp,
+        "iat": payload.iat,
+        "jti": str(payload.jti),
+    }
+    header = jwt.get_unverified_header(token)
+    assert header == {"alg": "EdDSA", "typ": "JWT", "kid": keyring.active.kid}
+
+
+def test_round_trip(codec: JWTCodec) -> None:
+    payload = TokenPayload(sub=uuid7(), iss=ISSUER)
+    decoded = codec.decode(codec.encode(payload))
+    assert (decoded.sub, decoded.exp, decoded.iat) == (
+        payload.sub,
+        payload.exp,
+        payload.iat,
+    )
+
+
+@pytest.mark.parametrize(
+    ("payload", "message"),
+    [
+        (claims(exp=int(time()) - 10), "Token has expired."),
+        (claims(iss="someone-else"), "Invalid issuer."),
+        (claims(exp=None), "Missing required claim."),
+        (claims(iss=None), "Missing required claim."),
+        (claims(sub=None), "Missing required claim."),
+        (claims(iat=int(time()) + 3600), "Invalid token."),
+        (claims(nbf=int(time()) + 3600), "Invalid token."),
+        (claims(aud="somebody"), "Invalid token."),
+    ],
+    ids=[
+        "expired",
+        "wrong-issuer",
+        "missing-exp",
+        "missing-iss",
+        "missing-sub",
+        "future-iat",
+        "future-nbf",
+        "unexpected-aud",
+    ],
+)
+def test_rejects_like_pyjwt(
+    codec: JWTCodec, keyring: KeyRing, payload: dict[str, t.Any], message: str
+) -> None:
+    token = pyjwt_encode(keyring.active, payload)
+    with pytest.raises(jwt.InvalidTokenError):
+        pyjwt_decode(keyring.active, token)
+    with pytest.raises(ValueError, match=f"^{message}$"):
+        codec.decode(token)
+
+
+def test_rejects_unknown_kid(codec: JWTCodec) -> None:
+    private_key = ed25519.Ed25519PrivateKey.generate()
+    stranger = SigningKey(
+        kid=key_id(private_key.public_key()),
+        public_key=private_key.public_key(),
+        private_key=private_key,
+        modified_at=0.0,
+    )
+    with pytest.raises(ValueError, match="^Unknown signing key.$"):
+        codec.decode(pyjwt_encode(stranger, claims()))
+
+
+def test_rejects_tampered_signature(codec: JWTCodec, keyring: KeyRing) -> None:
+    token = pyjwt_encode(keyring.active, claims())
+    signing_input, _, signature = token.rpartition(".")
+    raw = bytearray(b64url_decode(signature.encode()))
+    raw[0] ^= 0x01
+    tampered = f"{signing_input}.{b64url_encode(bytes(raw)).decode()}"
+    with pytest.raises(jwt.InvalidSignatureError):
+        pyjwt_decode(keyring.active, tampered)
+    with pytest.raises(ValueError, match="^Invalid token.$"):
+        codec.decode(tampered)
+
+
+def test_rejects_tampered_payload(codec: JWTCodec, keyring: KeyRing) -> None:
+    header, _, signature = pyjwt_encode(keyring.active, claims()).split(".")
+    forged = b64url_encode(json.dumps(claims()).encode()).decode()
+    with pytest.raises(ValueError, match="^Invalid token.$"):
+        codec.decode(f"{header}.{forged}.{signature}")
+
+
+def test_rejects_other_algorithm(codec: JWTCodec, keyring: KeyRing) -> None:
+    token = jwt.encode(claims(), "s" * 32, algorithm="HS256")
+    with pytest.raises(ValueError, match="^Invalid token.$"):
+        codec.decode(token)
+
+
+@pytest.mark.parametrize(
+    "mutate",
+    [
+        lambda token: token.replace(".", "", 1),
+        lambda token: token + ".extra",
+        lambda token: "!!!" + token,
+        lambda token: token.split(".")[0] + "..",
+        lambda token: "é" + token,
+        lambda token: "",
+    ],
+    ids=["two-segments", "four-segments", "bad-base64", "empty", "non-ascii", "blank"],
+)
+def test_rejects_malformed(
+    codec: JWTCodec, keyring: KeyRing, mutate: t.Callable[[str], str]
+) -> None:
+    token = mutate(pyjwt_encode(keyring.active, claims()))
+    with pytest.raises(jwt.InvalidTokenError):
+        pyjwt_decode(keyring.active, token)
+    with pytest.raises(ValueError, match="^Invalid token.$"):
+        codec.decode(token)
+
+
+def test_accepts_rotated_key(codec: JWTCodec, keyring: KeyRing) -> None:
+    old = keyring.active
+    token = pyjwt_encode(old, claims())
+    assert keyring.rotate().kid != old.kid
+    assert codec.decode(token).iss == ISSUER
@@ -0,0 +1,175 @@
+import asyncio
+import typing as t
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import pytest
+from blacksheep import FromQuery, Request
+from msgspec import json
+from uuid_utils.compat import uuid7
+
+from app.settings import HttpCache, Replicas
+from blog.endpoints import posts_api
+from blog.endpoints.posts_api import PostsAPI
+from blog.tables import Posts
+from utils.db_replicas import ReplicaRouter
+from utils.identity import UserIdentity
+from utils.response_cache import ResponseCache
+
+AUTHORS = 8
+
+
+def make_rows(count: int) -> list[dict[str, t.Any]]:
+    """
+    ``DETAIL_COLUMNS`` 查询的结果, 每篇文章的作者都不同
+    """
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": uuid7(),
+            "title": f"Post {i}",
+            "excerpt": "excerpt",
+            "content": "content",
+            "author": uuid7(),
+            "author_username": f"author{i}",
+            "author_nickname": f"Author {i}",
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": None,
+        }
+        for i in range(count)
+    ]
+
+
+class QueryLog:
+    """
+    替代数据库引擎: 记录每条 SQL 并返回预设的行
+    """
+
+    def __init__(self, rows: list[dict[str, t.Any]]) -> None:
+        self.rows = rows
+        self.statements: list[str] = []
+
+    async def run_querystring(self, querystring: t.Any, in_pool: bool = True):
+        sql, _ = querystring.compile_string(engine_type="postgres")
+        self.statements.append(sql)
+        return [dict(row) for row in self.rows]
+
+    @asynccontextmanager
+    async def acquire(self) -> t.AsyncIterator["QueryLog"]:
+        yield self
+
+    @asynccontextmanager
+    async def transaction(self, **kwargs: t.Any) -> t.AsyncIterator[None]:
+        yield
+
+    async def cursor(self, sql: str, *args: t.Any) -> "QueryLog":
+        self.statements.append(sql)
+        self._pending = [dict(row) for row in self.rows]
+        return self
+
+    async def fetch(self, size: int) -> list[dict[str, t.Any]]:
+        batch, self._pending = self._pending[:size], self._pending[size:]
+        return batch
+
+    @property
+    def selects(self) -> list[str]:
+        return [sql for sql in self.statements if sql.lstrip().startswith("SELECT")]
+
+
+@pytest.fixture
+def log() -> t.Iterator[QueryLog]:
+    log = QueryLog(make_rows(AUTHORS))
+    engine = Posts._meta.db
+    count_service = mock.Mock(total=mock.AsyncMock(return_value=None))
+
+    async def run_querystring(
+        self: t.Any, querystring: t.Any, in_pool: bool = True
+    ) -> list[dict[str, t.Any]]:
+        return await log.run_querystring(querystring, in_pool)
+
+    # PostgresEngine 使用 __slots__, 方法只能在类上替换
+    with mock.patch.object(
+        type(engine), "run_querystring", run_querystring
+    ), mock.patch.object(engine, "pool", log), mock.patch.object(
+        posts_api, "get_response_cache", return_value=ResponseCache(HttpCache())
+    ), mock.patch.object(
+        posts_api, "get_replica_router", return_value=ReplicaRouter(Replicas(), {})
+    ), mock.patch.object(
+        posts_api, "get_count_service", return_value=count_service
+    ):
+        yield log
+
+
+def anonymous() -> UserIdentity:
+    return UserIdentity({})
+
+
+def assert_single_join(log: QueryLog) -> None:
+    assert len(log.selects) == 1, log.statements
+    assert len(log.statements) == 1, log.statements
+    assert "JOIN" in log.selects[0]
+
+
+def assert_authors(posts: list[dict[str, t.Any]], rows: list[dict]) -> None:
+    assert [post["author"] for post in posts] == [
+        {
+            "id": str(row["author"]),
+            "username": row["author_username"],
+            "nickname": row["author_nickname"],
+        }
+        for row in rows
+    ]
+
+
+def test_list_issues_one_select(log: QueryLog) -> None:
+    async def run() -> bytes:
+        response = await PostsAPI.get_list(
+            PostsAPI(),
+            Request("GET", b"/api/posts/list?size=50", []),
+            anonymous(),
+            FromQuery(1),
+            FromQuery(50),
+            FromQuery(None),
+        )
+        return await response.read()
+
+    body = json.decode(asyncio.run(run()))
+    assert_single_join(log)
+    assert_authors(body["data"], log.rows)
+
+
+def test_detail_issues_one_select(log: QueryLog) -> None:
+    log.rows = log.rows[:1]
+
+    async def run() -> bytes:
+        response = await PostsAPI.get_detail(
+            PostsAPI(),
+            Request("GET", b"/api/posts/detail", []),
+            log.rows[0]["id"],
+            anonymous(),
+        )
+        return await response.read()
+
+    body = json.decode(asyncio.run(run()))
+    assert_single_join(log)
+    assert_authors([body["data"]], log.rows)
+
+
+@pytest.mark.parametrize("format", ["ndjson", "json"])
+def test_export_issues_one_select(log: QueryLog, format: str) -> None:
+    request = mock.Mock(is_disconnected=mock.AsyncMock(return_value=False))
+
+    async def run() -> bytes:
+        response = await PostsAPI.export(
+            PostsAPI(), request, FromQuery(None), FromQuery(format)
+        )
+        return b"".join([part async for part in response.content.get_parts()])
+
+    body = asyncio.run(run())
+    if format == "json":
+        posts = json.decode(body)
+    else:
+        posts = [json.decode(line) for line in body.splitlines()]
+    assert_single_join(log)
+    assert_authors(posts, log.rows)
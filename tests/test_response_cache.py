@@ -0,0 +1,75 @@
+import asyncio
+import typing as t
+from unittest import mock
+
+import pytest
+from blacksheep import Request
+from uuid_utils.compat import uuid7
+
+from app.settings import HttpCache, Replicas
+from utils import response_cache
+from utils.db_replicas import ReplicaRouter
+from utils.response_cache import CachedBody, ResponseCache
+
+
+@pytest.fixture
+def router() -> t.Iterator[ReplicaRouter]:
+    router = ReplicaRouter(Replicas(sticky_window=30), {"replica_0": mock.Mock()})
+    with mock.patch.object(response_cache, "get_replica_router", return_value=router):
+        yield router
+
+
+class Builder:
+    """
+    每次构建返回不同的响应体, 用于判断响应是否来自缓存
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def __call__(self) -> CachedBody:
+        self.calls += 1
+        return CachedBody(b'{"build":%d}' % self.calls)
+
+
+def get(cache: ResponseCache, build: Builder, user: t.Any = None) -> bytes:
+    async def run() -> bytes:
+        request = Request("GET", b"/api/posts/list", [])
+        response = await cache.respond(request, "posts.list", build, pin_key=user)
+        return await response.read()
+
+    return asyncio.run(run())
+
+
+def test_caches_without_pins(router: ReplicaRouter) -> None:
+    cache, build = ResponseCache(HttpCache()), Builder()
+    assert get(cache, build) == get(cache, build) == b'{"build":1}'
+    assert build.calls == 1
+
+
+def test_pinned_user_bypasses_cached_entry(router: ReplicaRouter) -> None:
+    cache, build = ResponseCache(HttpCache()), Builder()
+    author = uuid7()
+    assert get(cache, build) == b'{"build":1}'
+    router.pin(author)
+    # 作者刚写入, 不能读到写入前缓存的响应
+    assert get(cache, build, author) == b'{"build":2}'
+    assert get(cache, build, author) == b'{"build":3}'
+
+
+def test_nothing_stored_while_replicas_may_lag(router: ReplicaRouter) -> None:
+    cache, build = ResponseCache(HttpCache()), Builder()
+    router.pin(uuid7())
+    # 其他用户的请求可能读到落后的副本, 结果不写入缓存
+    assert get(cache, build) == b'{"build":1}'
+    assert get(cache, build) == b'{"build":2}'
+    assert cache.stats().size == 0
+
+
+def test_no_replicas_keeps_caching() -> None:
+    router = ReplicaRouter(Replicas(), {})
+    router.pin(uuid7())
+    cache, build = ResponseCache(HttpCache()), Builder()
+    with mock.patch.object(response_cache, "get_replica_router", return_value=router):
+        assert get(cache, build) == get(cache, build)
+    assert build.calls == 1
@@ -0,0 +1,37 @@
+from piccolo.apps.migrations.auto.migration_manager import MigrationManager
+from piccolo.columns.column_types import Timestamptz
+from piccolo.columns.indexes import IndexMethod
+
+
+ID = "2026-10-18T13:05:12:318204"
+VERSION = "1.24.2"
+DESCRIPTION = "Token revocation timestamp on auth_user"
+
+
+async def forwards() -> MigrationManager:
+    manager = MigrationManager(
+        migration_id=ID, app_name="user", description=DESCRIPTION
+    )
+
+    manager.add_column(
+        table_class_name="User",
+        tablename="auth_user",
+        column_name="tokens_revoked_at",
+        db_column_name="tokens_revoked_at",
+        column_class_name="Timestamptz",
+        column_class=Timestamptz,
+        params={
+            "default": None,
+            "null": True,
+            "primary_key": False,
+            "unique": False,
+            "index": False,
+            "index_method": IndexMethod.btree,
+            "choices": None,
+            "db_column_name": None,
+            "secret": False,
+        },
+        schema=None,
+    )
+
+    return manager
@@ -1,6 +1,28 @@
+import typing as t
+from uuid import UUID
 from msgspec import Struct
 
 
 class LoginInput(Struct):
+    max_body_size: t.ClassVar[int] = 4 * 1024
+
     username: str
     password: str
+
+
+class Principal(Struct, frozen=True, gc=False):
+    """
+    认证后缓存的精简用户信息, 不包含密码 hash.
+    ``version`` 为加载时的时间戳, 用于判断数据是否早于吊销时间;
+    ``revoked_at`` 为数据库中记录的吊销时间 (毫秒), 早于该时间签发的 token 无效
+    """
+
+    id: UUID
+    username: str
+    email: str
+    nickname: t.Optional[str]
+    active: bool
+    admin: bool
+    superuser: bool
+    version: int
+    revoked_at: int = 0
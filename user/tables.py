@@ -1,18 +1,27 @@
 import datetime
+import time
 import typing as t
 from piccolo.table import Table
 from piccolo.columns.base import Column
 from piccolo.columns import Varchar, Email, Boolean, Timestamptz
-from argon2 import PasswordHasher
 from argon2.exceptions import InvalidHash
 
 from uuid import UUID
 from utils.logging import get_logger
 from utils.column_types import UUID as UUIDv7
+from utils.bootstrap import BOOTSTRAP_LATCH
+from utils.db_replicas import get_replica_router
+from utils.identity_cache import get_identity_cache
+from utils.password import PasswordHasherBusy, get_password_service
+from user.schema import Principal
 
 logger = get_logger(__name__)
 
 
+def _millis(value: datetime.datetime) -> int:
+    return int(value.timestamp() * 1000)
+
+
 class User(Table, tablename="auth_user"):
     id = UUIDv7(primary_key=True, required=True)
     username = Varchar(length=36, unique=True)
@@ -23,14 +32,16 @@ class User(Table, tablename="auth_user"):
     admin = Boolean(default=False)
     superuser = Boolean(default=False)
     last_login = Timestamptz(null=True, default=None, required=False)
+    # 早于该时间签发的 token 全部失效 (修改密码, 停用用户时更新)
+    tokens_revoked_at = Timestamptz(null=True, default=None, required=False)
 
     _min_password_length = 6
     _max_password_length = 128
-    _ph = PasswordHasher()
 
     def __setattr__(self, name: str, value: t.Any) -> None:
         """
         确保密码被hash
+        异步路径 (``create_user`` 等) 会提前在工作池中完成 hash, 这里只做兜底
         """
         if name == "password" and (
             value[:9]
@@ -40,7 +51,8 @@ class User(Table, tablename="auth_user"):
                 "$argon2d$",
             }
         ):
-            value = self.__class__.hash_password(value)
+            self.__class__._validate_password(value)
+            value = get_password_service().hash_sync(value)
 
         super().__setattr__(name, value)
 
@@ -60,8 +72,8 @@ class User(Table, tablename="auth_user"):
     ###########################################################################
 
     @classmethod
-    def hash_password(cls, password: str) -> str:
-        """hash密码
+    async def hash_password(cls, password: str) -> str:
+        """hash密码, 在工作池中执行
         Args:
             password (str): 密码, 需要大于6位, 小于128位
 
@@ -70,7 +82,7 @@ class User(Table, tablename="auth_user"):
         """
         if not cls._validate_password(password):
             raise ValueError("Invalid password.")
-        return cls._ph.hash(password)
+        return await get_password_service().hash(password)
 
     @classmethod
     async def login(cls, username: str, password: str) -> t.Optional[UUID]:
@@ -87,20 +99,24 @@ class User(Table, tablename="auth_user"):
             return None
 
         stored_password = response.password
+        hasher = get_password_service()
         try:
-            if cls._ph.verify(stored_password, password):
+            if await hasher.verify(stored_password, password):
                 update_data: t.Dict[Column | str, t.Any] = {
                     cls.last_login: datetime.datetime.now(tz=datetime.timezone.utc)
                 }
-                if cls._ph.check_needs_rehash(stored_password):
+                if hasher.needs_rehash(stored_password):
                     update_data = {
                         **update_data,
-                        cls.password: cls.hash_password(password),
+                        cls.password: await cls.hash_password(password),
                     }
                 await cls.update(update_data).where(cls.username == username)
+                get_replica_router().pin(response.id)
                 return response.id
             else:
                 return None
+        except PasswordHasherBusy:
+            raise
         except InvalidHash as e:
             logger.warning(f"错误的用户密码存储, 无法验证: {e}")
             return None
@@ -110,6 +126,38 @@ class User(Table, tablename="auth_user"):
 
     ###########################################################################
 
+    @classmethod
+    async def load_principal(
+        cls, user_id: UUID, node: t.Optional[str] = None
+    ) -> t.Optional[Principal]:
+        """
+        只查询认证所需的列, 构造精简的 ``Principal``
+        在副本上未找到时回到主库再查一次, 新注册的用户不会因复制延迟被拒绝
+        """
+        query = cls.select(
+            cls.id,
+            cls.username,
+            cls.email,
+            cls.nickname,
+            cls.active,
+            cls.admin,
+            cls.superuser,
+            cls.tokens_revoked_at,
+        ).where(cls.id == user_id)
+        row = await query.first().run(node=node)
+        if not row and node is not None:
+            row = await query.first()
+        if not row:
+            return None
+        revoked_at = row.pop("tokens_revoked_at")
+        return Principal(
+            **row,
+            version=int(time.time()),
+            revoked_at=_millis(revoked_at) if revoked_at else 0,
+        )
+
+    ###########################################################################
+
     @classmethod
     async def update_password(
         cls,
@@ -130,16 +178,51 @@ class User(Table, tablename="auth_user"):
         else:
             clause = cls.username == username
 
-        password = cls.hash_password(password)
+        password = await cls.hash_password(password)
+        revoked_at = datetime.datetime.now(tz=datetime.timezone.utc)
 
-        await cls.update({cls.password: password}).where(clause).run()
+        rows = (
+            await cls.update(
+                {cls.password: password, cls.tokens_revoked_at: revoked_at}
+            )
+            .where(clause)
+            .returning(cls.id)
+        )
+        for row in rows:
+            get_replica_router().pin(row["id"])
+            await get_identity_cache().invalidate_user(row["id"], _millis(revoked_at))
+
+    @classmethod
+    async def set_active(cls, user_id: UUID, active: bool) -> None:
+        """
+        启用/停用用户, 停用时吊销该用户已签发的全部 token
+        """
+        if active:
+            await cls.update({cls.active: True}).where(cls.id == user_id)
+            get_replica_router().pin(user_id)
+            return
+        revoked_at = datetime.datetime.now(tz=datetime.timezone.utc)
+        await cls.update({cls.active: False, cls.tokens_revoked_at: revoked_at}).where(
+            cls.id == user_id
+        )
+        get_replica_router().pin(user_id)
+        await get_identity_cache().invalidate_user(user_id, _millis(revoked_at))
 
     ###########################################################################
 
     @classmethod
     async def create_user(
-        cls, username: str, password: str, email: str, nickname: t.Optional[str] = None
+        cls,
+        username: str,
+        password: str,
+        email: str,
+        nickname: t.Optional[str] = None,
+        superuser: bool = False,
     ) -> "User":
+        """
+        ``superuser`` 为 True 时创建超级管理员 (同时具有 admin 权限),
+        仅供引导程序创建首个账号使用
+        """
         if not username:
             raise ValueError("username cannot be empty")
         if not email:
@@ -150,10 +233,13 @@ class User(Table, tablename="auth_user"):
 
         user = cls(
             username=username,
-            password=password,
+            password=await cls.hash_password(password),
             email=email,
             nickname=nickname,
             active=True,
+            admin=superuser,
+            superuser=superuser,
         )
         await user.save()
+        BOOTSTRAP_LATCH.close()
         return user
@@ -1,26 +1,80 @@
 from typing import Any, TypeVar
 
 from msgspec import Struct, ValidationError, DecodeError
-from msgspec.json import decode as msgspec_decode
 
 from blacksheep.messages import Request
 from blacksheep.server.bindings import Binder, BoundValue
-from blacksheep.exceptions import BadRequest
+from blacksheep.exceptions import BadRequest, HTTPException
+
+from utils.codecs import json_decoder
 
 SchemaType = TypeVar("SchemaType", bound=Struct)
 
+# Schema 未声明 ``max_body_size`` 时的请求体上限
+DEFAULT_MAX_BODY_SIZE = 1024 * 1024
+
+
+class PayloadTooLarge(HTTPException):
+    """
+    请求体超过 schema 声明的上限
+    """
+
+    def __init__(self, limit: int) -> None:
+        super().__init__(413, f"Request body exceeds {limit} bytes.")
+
 
-class FromSchema(BoundValue[SchemaType]): ...
+class FromSchema(BoundValue[SchemaType]):
+    """
+    按 msgspec Struct 解析 JSON 请求体.
+    Struct 可以通过 ``max_body_size: ClassVar[int]`` 声明请求体的字节上限
+    """
+
+
+async def read_limited(request: Request, limit: int) -> bytes:
+    """
+    读取请求体, 超过 ``limit`` 字节时立即中止:
+    ``Content-Length`` 已超限时不读取, 分块传输时在累计超限的那一块停止.
+    请求体已经完整缓冲时 (例如 TestClient) 直接使用, 不再读取流
+    """
+    content_length = request.get_first_header(b"Content-Length")
+    if content_length is not None:
+        try:
+            length = int(content_length)
+        except ValueError as e:
+            raise BadRequest("Invalid Content-Length.") from e
+        if length > limit:
+            raise PayloadTooLarge(limit)
+    content = request.content
+    if content is not None and content.body is not None:
+        if len(content.body) > limit:
+            raise PayloadTooLarge(limit)
+        return content.body
+    body = bytearray()
+    async for chunk in request.stream():
+        if not chunk:
+            continue
+        body += chunk
+        if len(body) > limit:
+            raise PayloadTooLarge(limit)
+    return bytes(body)
 
 
 class SchemaBinder(Binder):
     handle = FromSchema
 
+    def __init__(self, expected_type: Any, *args: Any, **kwargs: Any) -> None:
+        super().__init__(expected_type, *args, **kwargs)
+        # 路由绑定 (应用启动) 时构建 Decoder, 请求期间不再有构建开销
+        self.decoder = json_decoder(expected_type)
+        self.max_body_size: int = getattr(
+            expected_type, "max_body_size", DEFAULT_MAX_BODY_SIZE
+        )
+
     async def get_value(self, request: Request) -> Any:
+        body = await read_limited(request, self.max_body_size)
+        if not body:
+            raise BadRequest("Empty body")
         try:
-            body = await request.read()
-            if not body:
-                raise BadRequest("Empty body")
-            return msgspec_decode(body, type=self.expected_type)
+            return self.decoder.decode(body)
         except (ValidationError, DecodeError) as e:
             raise BadRequest(f"Invalid payload: {e}") from e
@@ -0,0 +1,29 @@
+import typing as t
+
+
+class BootstrapLatch:
+    """
+    记录数据库中是否已存在用户. 该状态只会从 False 变为 True 一次,
+    变为 True 之后不再查询数据库.
+
+    多 worker 部署时, 未创建用户的 worker 在状态为 False 期间每次都会重新查询,
+    因此第一次看到其他 worker 创建的用户后即会锁定, 不需要额外的通知机制.
+    """
+
+    def __init__(self) -> None:
+        self._users_exist = False
+
+    @property
+    def users_exist(self) -> bool:
+        return self._users_exist
+
+    def close(self) -> None:
+        self._users_exist = True
+
+    async def refresh(self, check: t.Callable[[], t.Awaitable[bool]]) -> bool:
+        if not self._users_exist and await check():
+            self._users_exist = True
+        return self._users_exist
+
+
+BOOTSTRAP_LATCH = BootstrapLatch()
@@ -0,0 +1,284 @@
+import asyncio
+import gzip
+import typing as t
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from blacksheep import Content, Request, Response
+from msgspec import Struct
+
+from app.settings import Compression, Encoding, load_settings
+from utils.logging import get_logger
+from utils.singleflight import SingleFlight
+
+logger = get_logger(__name__)
+
+Compress = t.Callable[[bytes], bytes]
+Handler = t.Callable[[Request], t.Awaitable[Response]]
+
+
+class Codec(t.NamedTuple):
+    # 动态响应使用的压缩函数, 偏向速度
+    fast: Compress
+    # 预压缩的结果会被反复使用, 压缩率更高;
+    # 缓存的接口响应在 TTL 后会重新压缩, 因此不使用最慢的级别
+    best: Compress
+
+
+def _gzip_codec() -> Codec:
+    # mtime=0: 相同内容的压缩结果保持一致
+    return Codec(
+        fast=lambda data: gzip.compress(data, 6, mtime=0),
+        best=lambda data: gzip.compress(data, 9, mtime=0),
+    )
+
+
+def _brotli_codec() -> t.Optional[Codec]:
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return Codec(
+        fast=lambda data: brotli.compress(data, quality=4),
+        best=lambda data: brotli.compress(data, quality=9),
+    )
+
+
+def _zstd_codec() -> t.Optional[Codec]:
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    # ZstdCompressor 不能在多个线程中同时使用, 每次压缩都新建
+    return Codec(
+        fast=lambda data: zstandard.ZstdCompressor(level=3).compress(data),
+        best=lambda data: zstandard.ZstdCompressor(level=12).compress(data),
+    )
+
+
+_CODEC_FACTORIES: dict[Encoding, t.Callable[[], t.Optional[Codec]]] = {
+    "gzip": _gzip_codec,
+    "br": _brotli_codec,
+    "zstd": _zstd_codec,
+}
+
+_COMPRESSIBLE_TYPES = (
+    b"text/",
+    b"application/json",
+    b"application/javascript",
+    b"application/xml",
+)
+
+
+def _is_compressible(content_type: bytes) -> bool:
+    return content_type.lower().startswith(_COMPRESSIBLE_TYPES)
+
+
+@lru_cache(maxsize=256)
+def negotiate(accept_encoding: bytes, available: tuple[str, ...]) -> t.Optional[str]:
+    """
+    按服务端优先级从 ``Accept-Encoding`` 中选择编码, 都不接受时返回 None.
+    客户端的取值种类很少, 因此缓存解析结果
+    """
+    weights: dict[str, float] = {}
+    for item in accept_encoding.decode("latin-1").lower().split(","):
+        name, _, params = item.partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip()] = weight
+    wildcard = weights.get("*", 0.0)
+    for encoding in available:
+        if weights.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+class _Variants(t.NamedTuple):
+    # 持有原始响应体的引用, 保证以 id 为键时不会被其他对象复用
+    body: bytes
+    compressed: dict[str, bytes]
+
+
+class PrecompressedCache:
+    """
+    只压缩一次的响应体: 通过 ``register`` 登记内容不变的 bytes 对象,
+    之后每种编码只压缩一次, 再次响应时直接复用.
+    以对象身份识别响应体, 同一内容的新 bytes 对象需要重新登记
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[int, _Variants] = OrderedDict()
+        self._inflight: SingleFlight[bytes] = SingleFlight()
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def register(self, body: bytes) -> None:
+        key = id(body)
+        entry = self._entries.get(key)
+        if entry is None or entry.body is not body:
+            self._entries[key] = _Variants(body=body, compressed={})
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _get(self, body: bytes) -> t.Optional[_Variants]:
+        entry = self._entries.get(id(body))
+        if entry is None or entry.body is not body:
+            return None
+        return entry
+
+    async def get(
+        self,
+        body: bytes,
+        encoding: str,
+        compress: t.Callable[[], t.Awaitable[bytes]],
+    ) -> t.Optional[bytes]:
+        """
+        返回已登记响应体的压缩结果, 未登记时返回 None.
+        同一响应体与编码的并发首次请求只压缩一次
+        """
+        entry = self._get(body)
+        if entry is None:
+            return None
+        self._entries.move_to_end(id(body))
+        compressed = entry.compressed.get(encoding)
+        if compressed is not None:
+            self.hits += 1
+            return compressed
+        compressed = await self._inflight.do((id(body), encoding), compress)
+        entry.compressed[encoding] = compressed
+        return compressed
+
+
+class CompressionStats(Struct):
+    encodings: list[str]
+    responses: dict[str, int]
+    bytes_in: int
+    bytes_out: int
+    offloaded: int
+    precompressed_size: int
+    precompressed_hits: int
+
+
+class CompressionMiddleware:
+    """
+    按 ``Accept-Encoding`` 协商压缩响应体:
+    - 小于 ``min_size`` 的响应体、流式响应、已编码或不可压缩的类型保持不变
+    - 达到 ``thread_threshold`` 的响应体在线程池中压缩
+    - 预压缩缓存中登记的响应体每种编码只压缩一次
+    压缩后强 ETag 改为弱 ETag, 与 nginx 的做法一致
+    """
+
+    def __init__(self, settings: Compression, cache: PrecompressedCache) -> None:
+        self.settings = settings
+        self.cache = cache
+        self.codecs: dict[str, Codec] = {}
+        for encoding in settings.encodings:
+            codec = _CODEC_FACTORIES[encoding]()
+            if codec is None:
+                logger.info(
+                    f"Compression `{encoding}` is not available, "
+                    "install the corresponding package to enable it"
+                )
+                continue
+            self.codecs[encoding] = codec
+        self.available = tuple(self.codecs)
+        self._executor: t.Optional[ThreadPoolExecutor] = None
+        self._responses: Counter[str] = Counter()
+        self._bytes_in = self._bytes_out = self._offloaded = 0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.settings.max_workers,
+                thread_name_prefix="compression",
+            )
+        return self._executor
+
+    async def _run(self, fn: Compress, data: bytes) -> bytes:
+        if len(data) < self.settings.thread_threshold:
+            return fn(data)
+        # zlib, brotli 与 zstandard 在压缩时都会释放 GIL
+        self._offloaded += 1
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, data)
+
+    async def _compress(self, body: bytes, encoding: str) -> bytes:
+        codec = self.codecs[encoding]
+        compressed = await self.cache.get(
+            body, encoding, lambda: self._run(codec.best, body)
+        )
+        if compressed is None:
+            compressed = await self._run(codec.fast, body)
+        return compressed
+
+    async def __call__(self, request: Request, handler: Handler) -> Response:
+        response = await handler(request)
+        content = response.content
+        if (
+            content is None
+            or content.body is None
+            or not _is_compressible(content.type)
+            or response.has_header(b"Content-Encoding")
+        ):
+            return response
+
+        response.add_header(b"Vary", b"Accept-Encoding")
+        body = content.body
+        if len(body) < self.settings.min_size:
+            return response
+        accept_encoding = request.get_first_header(b"Accept-Encoding")
+        if not accept_encoding:
+            return response
+        encoding = negotiate(accept_encoding, self.available)
+        if encoding is None:
+            return response
+
+        compressed = await self._compress(body, encoding)
+        if len(compressed) >= len(body):
+            return response
+        self._responses[encoding] += 1
+        self._bytes_in += len(body)
+        self._bytes_out += len(compressed)
+
+        etag = response.get_first_header(b"ETag")
+        if etag is not None and not etag.startswith(b"W/"):
+            response.set_header(b"ETag", b"W/" + etag)
+        response.add_header(b"Content-Encoding", encoding.encode())
+        response.content = Content(content.type, compressed)
+        return response
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> CompressionStats:
+        return CompressionStats(
+            encodings=list(self.available),
+            responses=dict(self._responses),
+            bytes_in=self._bytes_in,
+            bytes_out=self._bytes_out,
+            offloaded=self._offloaded,
+            precompressed_size=len(self.cache),
+            precompressed_hits=self.cache.hits,
+        )
+
+
+_cache: t.Optional[PrecompressedCache] = None
+
+
+def get_precompressed_cache() -> PrecompressedCache:
+    global _cache
+    if _cache is None:
+        _cache = PrecompressedCache(load_settings().compression.precompressed_maxsize)
+    return _cache
@@ -0,0 +1,139 @@
+import typing as t
+from time import monotonic
+
+from msgspec import Struct
+from piccolo.table import Table
+
+from app.settings import CountStrategy, Pagination, load_settings
+from utils.metrics import register_metrics
+from utils.singleflight import SingleFlight
+
+
+class Total(t.NamedTuple):
+    value: int
+    estimated: bool
+
+
+class _Cached(t.NamedTuple):
+    value: int
+    expires_at: float
+
+
+class CountStats(Struct):
+    exact: dict[str, int]
+    estimated: dict[str, int]
+    queries: int
+
+
+class CountService:
+    """
+    分页总数服务, 避免每个请求都执行 ``COUNT(*)``:
+    - exact: 首次查询后缓存, 写入路径通过 ``adjust`` 增量维护, 过期后重新计数
+    - estimated: 读取 ``pg_class.reltuples``, 适合大表; 表从未 ANALYZE 时退回 exact
+    - has_more: 不统计总数, 由分页结果判断是否有下一页
+    缓存键为表名, 只统计整表, 不适用于带过滤条件的查询.
+    """
+
+    def __init__(self, settings: Pagination) -> None:
+        self.settings = settings
+        self._exact: dict[str, _Cached] = {}
+        self._estimated: dict[str, _Cached] = {}
+        self._generations: dict[str, int] = {}
+        self._inflight: SingleFlight[int] = SingleFlight()
+        self._queries = 0
+
+    def strategy(self, route: str) -> CountStrategy:
+        return self.settings.count_strategy.get(route, "has_more")
+
+    async def total(self, route: str, table: t.Type[Table]) -> t.Optional[Total]:
+        strategy = self.strategy(route)
+        if strategy == "estimated":
+            estimate = await self._estimate(table)
+            if estimate is not None:
+                return Total(estimate, estimated=True)
+            strategy = "exact"
+        if strategy == "exact":
+            return Total(await self._count(table), estimated=False)
+        return None
+
+    def _fresh(self, cache: dict[str, _Cached], name: str) -> t.Optional[int]:
+        cached = cache.get(name)
+        if cached is None or cached.expires_at <= monotonic():
+            return None
+        return cached.value
+
+    async def _count(self, table: t.Type[Table]) -> int:
+        name = table._meta.tablename
+        value = self._fresh(self._exact, name)
+        if value is not None:
+            return value
+
+        async def query() -> int:
+            generation = self._generations.get(name, 0)
+            self._queries += 1
+            count = await table.count()
+            # 计数期间发生过写入时不缓存, 避免漏计或重复计入
+            if generation == self._generations.get(name, 0):
+                self._exact[name] = _Cached(
+                    count, monotonic() + self.settings.exact_count_ttl
+                )
+            return count
+
+        return await self._inflight.do(("exact", name), query)
+
+    async def _estimate(self, table: t.Type[Table]) -> t.Optional[int]:
+        name = table._meta.tablename
+        value = self._fresh(self._estimated, name)
+        if value is not None:
+            return value if value >= 0 else None
+
+        async def query() -> int:
+            self._queries += 1
+            rows = await table.raw(
+                "SELECT reltuples::bigint AS estimate FROM pg_class "
+                "WHERE oid = {}::regclass",
+                name,
+            )
+            estimate = rows[0]["estimate"] if rows else -1
+            self._estimated[name] = _Cached(
+                estimate, monotonic() + self.settings.estimated_count_ttl
+            )
+            return estimate
+
+        estimate = await self._inflight.do(("estimated", name), query)
+        # PostgreSQL 14+ 中从未 VACUUM/ANALYZE 的表 reltuples 为 -1
+        return estimate if estimate >= 0 else None
+
+    def adjust(self, table: t.Type[Table], delta: int) -> None:
+        """
+        写入路径调用: 插入为正数, 删除为负数
+        """
+        name = table._meta.tablename
+        self._generations[name] = self._generations.get(name, 0) + 1
+        cached = self._exact.get(name)
+        if cached is not None:
+            self._exact[name] = cached._replace(value=max(cached.value + delta, 0))
+
+    def invalidate(self, table: t.Type[Table]) -> None:
+        name = table._meta.tablename
+        self._generations[name] = self._generations.get(name, 0) + 1
+        self._exact.pop(name, None)
+        self._estimated.pop(name, None)
+
+    def stats(self) -> CountStats:
+        return CountStats(
+            exact={name: cached.value for name, cached in self._exact.items()},
+            estimated={name: cached.value for name, cached in self._estimated.items()},
+            queries=self._queries,
+        )
+
+
+_service: t.Optional[CountService] = None
+
+
+def get_count_service() -> CountService:
+    global _service
+    if _service is None:
+        _service = CountService(load_settings().pagination)
+        register_metrics("counts", _service.stats)
+    return _service
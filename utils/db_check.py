@@ -1,8 +1,11 @@
-import subprocess
+import os
 import typing as t
+from piccolo.apps.migrations.commands.check import CheckMigrationManager
+from piccolo.apps.migrations.commands.forwards import run_forwards
 from piccolo.engine import Engine
 from utils.logging import get_logger
-from app.settings import BASE_DIR
+from utils.timing import PhaseTimer
+from app.settings import BASE_DIR, load_settings
 
 logger = get_logger(__name__)
 
@@ -48,20 +51,77 @@ async def check_uuidv7(engine: Engine[t.Any]) -> None:
         logger.error(f"Error checking uuidv7: {e}")
 
 
-async def run_migration() -> None:
+# 所有 worker 共用的 advisory lock 键, 保证同一时间只有一个 worker 执行迁移
+MIGRATION_LOCK_KEY = 0x4E415A4F
+
+MigrationMode = t.Literal["run", "verify", "skip"]
+
+
+class MigrationError(RuntimeError):
+    """
+    迁移失败或存在未执行的迁移, 应用不能以错误的表结构继续启动
+    """
+
+
+def migration_mode() -> MigrationMode:
+    """
+    环境变量 ``NAZO_MIGRATIONS`` 优先于 config.toml 中的 ``database.migrations``
+    """
+    mode = os.environ.get("NAZO_MIGRATIONS") or load_settings().database.migrations
+    if mode not in ("run", "verify", "skip"):
+        raise MigrationError(f"Unknown migration mode: {mode}")
+    return t.cast(MigrationMode, mode)
+
+
+async def verify_migrations() -> None:
     """
-    Check if the migration is valid and the pg_uuidv7 extension is installed.
+    确认所有迁移均已执行, 否则抛出异常
     """
-    subprocess.run(
-        ["piccolo", "migrations", "forwards", "all"], stdout=subprocess.DEVNULL
-    )
-    logger.info("Migration is completed, please check the migration status.")
-    subprocess.run(
-        ["piccolo", "migrations", "check"],
-        check=True,
-    )
-
-
-async def check_database(engine: Engine[t.Any]) -> None:
-    await check_uuidv7(engine)
-    await run_migration()
+    statuses = await CheckMigrationManager(app_name="all").get_migration_statuses()
+    pending = [
+        f"{status.app_name}:{status.migration_id}"
+        for status in statuses
+        if not status.has_ran
+    ]
+    if pending:
+        raise MigrationError(f"Pending migrations: {', '.join(pending)}")
+    logger.info(f"All {len(statuses)} migrations have been applied.")
+
+
+async def run_migration(engine: Engine[t.Any]) -> None:
+    """
+    在当前进程中执行迁移. 持有 advisory lock 的专用连接保证只有一个 worker 迁移,
+    其他 worker 等待锁释放后只会发现没有需要执行的迁移.
+    """
+    connection = await engine.get_new_connection()
+    try:
+        await connection.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_KEY)
+        try:
+            try:
+                result = await run_forwards(app_name="all")
+            except Exception as e:
+                raise MigrationError(f"Migration failed: {e}") from e
+            if not result.success:
+                raise MigrationError(f"Migration failed: {result.message}")
+            logger.info("Migration is completed, please check the migration status.")
+        finally:
+            await connection.execute(
+                "SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_KEY
+            )
+    finally:
+        await connection.close()
+    await verify_migrations()
+
+
+async def check_database(engine: Engine[t.Any], timer: PhaseTimer) -> None:
+    with timer.phase("uuidv7"):
+        await check_uuidv7(engine)
+
+    mode = migration_mode()
+    with timer.phase(f"migrations[{mode}]"):
+        if mode == "run":
+            await run_migration(engine)
+        elif mode == "verify":
+            await verify_migrations()
+        else:
+            logger.warning("Migrations are skipped.")
@@ -0,0 +1,100 @@
+import typing as t
+from time import perf_counter
+
+from msgspec import Struct
+from piccolo.engine.postgres import PostgresEngine
+
+from utils.metrics import Histogram, HistogramSnapshot
+
+
+class PoolStats(Struct):
+    min_size: int
+    max_size: int
+    size: int
+    idle: int
+    in_use: int
+    waiting: int
+    acquire: HistogramSnapshot
+
+
+class _TimedAcquire:
+    """
+    包装 asyncpg 的 ``PoolAcquireContext``, 同时支持 ``async with`` 与 ``await``
+    """
+
+    def __init__(self, context: t.Any, pool: "InstrumentedPool") -> None:
+        self._context = context
+        self._pool = pool
+
+    async def _acquire(self, acquire: t.Awaitable[t.Any]) -> t.Any:
+        self._pool.waiting += 1
+        start = perf_counter()
+        try:
+            return await acquire
+        finally:
+            self._pool.waiting -= 1
+            self._pool.acquire_latency.observe((perf_counter() - start) * 1000)
+
+    async def __aenter__(self) -> t.Any:
+        return await self._acquire(self._context.__aenter__())
+
+    async def __aexit__(self, *exc_info: t.Any) -> None:
+        await self._context.__aexit__(*exc_info)
+
+    def __await__(self) -> t.Generator[t.Any, None, t.Any]:
+        return self._acquire(self._context).__await__()
+
+
+class InstrumentedPool:
+    """
+    asyncpg 连接池的代理, 统计等待获取连接的协程数与获取延迟
+    """
+
+    def __init__(self, pool: t.Any) -> None:
+        self._pool = pool
+        self.waiting = 0
+        self.acquire_latency = Histogram()
+
+    def acquire(self, *, timeout: t.Optional[float] = None) -> _TimedAcquire:
+        return _TimedAcquire(self._pool.acquire(timeout=timeout), self)
+
+    def __getattr__(self, name: str) -> t.Any:
+        return getattr(self._pool, name)
+
+    def stats(self) -> PoolStats:
+        size, idle = self._pool.get_size(), self._pool.get_idle_size()
+        return PoolStats(
+            min_size=self._pool.get_min_size(),
+            max_size=self._pool.get_max_size(),
+            size=size,
+            idle=idle,
+            in_use=size - idle,
+            waiting=self.waiting,
+            acquire=self.acquire_latency.snapshot(),
+        )
+
+
+class InstrumentedPostgresEngine(PostgresEngine):
+    """
+    启动连接池时使用 ``pool_options`` 作为默认参数, 并为连接池加上统计代理
+    """
+
+    def __init__(
+        self,
+        config: dict[str, t.Any],
+        pool_options: t.Optional[dict[str, t.Any]] = None,
+        **kwargs: t.Any,
+    ) -> None:
+        super().__init__(config=config, **kwargs)
+        self.pool_options = pool_options or {}
+
+    async def start_connection_pool(self, **kwargs: t.Any) -> None:
+        if self.pool:
+            return await super().start_connection_pool(**kwargs)
+        await super().start_connection_pool(**{**self.pool_options, **kwargs})
+        self.pool = t.cast(t.Any, InstrumentedPool(self.pool))
+
+    def pool_stats(self) -> t.Optional[PoolStats]:
+        if isinstance(self.pool, InstrumentedPool):
+            return self.pool.stats()
+        return None
@@ -0,0 +1,188 @@
+import asyncio
+import typing as t
+from time import monotonic
+
+from msgspec import Struct
+from piccolo.engine import engine_finder
+from piccolo.engine.postgres import PostgresEngine
+
+from app.settings import Replicas, load_settings
+from utils.db_pool import InstrumentedPool
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# 没有待回放的 WAL 时视为无延迟, 避免主库空闲时 replay 时间戳不断变旧而误判
+LAG_QUERY = """
+SELECT CASE
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(
+        EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0
+    )
+END
+"""
+
+
+class ReplicaStats(Struct):
+    node: str
+    available: bool
+    lag: t.Optional[float]
+    reads: int
+
+
+class ReplicaRouter:
+    """
+    只读查询的路由: 通过 Piccolo 的 ``extra_nodes`` 把读请求分配到副本上.
+    返回 ``None`` 时表示使用主库, 以下情况读请求会留在主库:
+    - 没有配置副本, 或所有副本都未通过健康检查 (连接池未启动、查询失败、
+      复制延迟超过 ``max_lag``)
+    - 该用户在 ``sticky_window`` 秒内有过写入 (read-your-writes)
+    """
+
+    def __init__(self, settings: Replicas, nodes: t.Mapping[str, PostgresEngine]):
+        self.settings = settings
+        self.nodes = dict(nodes)
+        # 通过健康检查后才接收读请求
+        self._available: list[str] = []
+        self._lag: dict[str, t.Optional[float]] = {name: None for name in self.nodes}
+        self._reads = {name: 0 for name in self.nodes}
+        self._cursor = 0
+        self._sticky: dict[t.Hashable, float] = {}
+        self._pinned_until = 0.0
+        self._health_task: t.Optional[asyncio.Task[None]] = None
+
+    def pin(self, key: t.Optional[t.Hashable]) -> None:
+        """
+        标记 ``key`` (通常为用户 id) 刚刚写入过数据
+        """
+        if key is None or not self.nodes:
+            return
+        now = monotonic()
+        if len(self._sticky) > 1024:
+            self._sticky = {k: v for k, v in self._sticky.items() if v > now}
+        self._sticky[key] = now + self.settings.sticky_window
+        self._pinned_until = now + self.settings.sticky_window
+
+    def is_pinned(self, key: t.Optional[t.Hashable]) -> bool:
+        """
+        ``key`` 是否仍在 read-your-writes 窗口内, 此时其读请求只走主库
+        """
+        return key is not None and self._sticky.get(key, 0) > monotonic()
+
+    @property
+    def has_pins(self) -> bool:
+        """
+        ``sticky_window`` 秒内是否有任何写入; 此时副本可能还未追上主库
+        """
+        return self._pinned_until > monotonic()
+
+    def read_node(self, key: t.Optional[t.Hashable] = None) -> t.Optional[str]:
+        if not self._available:
+            return None
+        if self.is_pinned(key):
+            return None
+        if self.settings.strategy == "least_busy":
+            node = min(self._available, key=self._busy)
+        else:
+            self._cursor = (self._cursor + 1) % len(self._available)
+            node = self._available[self._cursor]
+        self._reads[node] += 1
+        return node
+
+    def engine(self, node: t.Optional[str]) -> PostgresEngine:
+        """
+        ``read_node`` 返回值对应的引擎, 供需要直接使用连接的场景
+        """
+        primary = engine_finder()
+        if node is None:
+            return t.cast(PostgresEngine, primary)
+        return self.nodes[node]
+
+    def _busy(self, node: str) -> int:
+        pool = self.nodes[node].pool
+        if isinstance(pool, InstrumentedPool):
+            stats = pool.stats()
+            return stats.in_use + stats.waiting
+        return 0
+
+    async def start(self) -> None:
+        """
+        各副本分别启动并检查, 失败的副本不接收读请求,
+        之后由健康检查定期重试, 恢复后重新加入
+        """
+        await self.refresh()
+        if self.nodes:
+            self._health_task = asyncio.create_task(self._watch())
+
+    async def close(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        self._available = []
+        for engine in self.nodes.values():
+            if engine.pool is not None:
+                await engine.close_connection_pool()
+
+    async def _check(self, name: str, engine: PostgresEngine) -> bool:
+        """
+        启动尚未启动的连接池并执行一次查询; ``max_lag`` > 0 时同时检查复制延迟
+        """
+        if engine.pool is None:
+            try:
+                await engine.start_connection_pool()
+            except Exception as e:
+                logger.warning(f"Read replica `{name}` is unavailable: {e}")
+                return False
+            logger.info(f"Read replica `{name}` connection pool opened")
+        try:
+            async with engine.pool.acquire() as connection:
+                if self.settings.max_lag <= 0:
+                    await connection.fetchval("SELECT 1")
+                    return True
+                lag = float(await connection.fetchval(LAG_QUERY))
+        except Exception as e:
+            logger.warning(f"Read replica `{name}` health check failed: {e}")
+            self._lag[name] = None
+            return False
+        self._lag[name] = lag
+        return lag <= self.settings.max_lag
+
+    async def refresh(self) -> None:
+        """
+        检查全部副本并更新可接收读请求的列表
+        """
+        healthy = await asyncio.gather(
+            *(self._check(name, engine) for name, engine in self.nodes.items())
+        )
+        available = [name for name, ok in zip(self.nodes, healthy) if ok]
+        if available != self._available:
+            logger.warning(f"Available read replicas: {available or 'none'}")
+            self._available = available
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.settings.lag_check_interval)
+            await self.refresh()
+
+    def stats(self) -> list[ReplicaStats]:
+        return [
+            ReplicaStats(
+                node=name,
+                available=name in self._available,
+                lag=self._lag[name],
+                reads=self._reads[name],
+            )
+            for name in self.nodes
+        ]
+
+
+_router: t.Optional[ReplicaRouter] = None
+
+
+def get_replica_router() -> ReplicaRouter:
+    global _router
+    if _router is None:
+        engine = engine_finder()
+        nodes = engine.extra_nodes if isinstance(engine, PostgresEngine) else {}
+        _router = ReplicaRouter(load_settings().database.replicas, nodes)
+    return _router
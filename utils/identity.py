@@ -1,6 +1,7 @@
 import typing as t
 from guardpost import Identity
 
+from user.schema import Principal
 from user.tables import User
 
 from uuid import UUID
@@ -8,7 +9,7 @@ from uuid import UUID
 
 class UserIdentity(Identity):
     @property
-    def account(self) -> t.Optional[User]:
+    def account(self) -> t.Optional[Principal]:
         return self.get("account")
 
     @property
@@ -22,3 +23,11 @@ class UserIdentity(Identity):
     @property
     def email(self) -> t.Optional[str]:
         return self.account.email if self.account else None
+
+    async def get_user(self) -> t.Optional[User]:
+        """
+        按需加载完整的 ``User`` 行, 结果不会被缓存
+        """
+        if not self.account:
+            return None
+        return await User.objects().get(User.id == self.account.id)
@@ -0,0 +1,327 @@
+import os
+import struct
+import sys
+import typing as t
+import zlib
+from collections import OrderedDict
+from hashlib import blake2b
+from multiprocessing import shared_memory
+from time import time
+from uuid import UUID
+
+from app.settings import AuthCache, load_settings
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class CacheBackend(t.Protocol):
+    """
+    共享层接口, 值为不透明的 bytes
+    """
+
+    async def get_many(self, keys: t.Sequence[str]) -> list[t.Optional[bytes]]:
+        """
+        按顺序返回各键的值, 不存在或已过期时为 None
+        """
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        """
+        写入值, ``ttl`` 秒后过期
+        """
+
+    async def delete(self, key: str) -> None:
+        """
+        删除键, 不存在时忽略
+        """
+
+    async def close(self) -> None:
+        """
+        释放连接或共享内存
+        """
+
+
+class RedisBackend:
+    """
+    基于 Redis 协议的共享层, 任何兼容 RESP 的服务 (Redis/Valkey/KeyDB 等) 均可使用
+    """
+
+    def __init__(self, url: str) -> None:
+        try:
+            from redis.asyncio import Redis
+        except ImportError as e:
+            raise RuntimeError('auth_cache.backend = "redis" 需要安装 redis') from e
+        self._client = Redis.from_url(url)
+
+    async def get_many(self, keys: t.Sequence[str]) -> list[t.Optional[bytes]]:
+        return await self._client.mget(keys)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._client.set(key, value, px=max(int(ttl * 1000), 1))
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(key)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+def _open_shared_memory(name: str, size: int = 0) -> shared_memory.SharedMemory:
+    """
+    创建 (``size`` > 0) 或打开共享内存, 且不交给 resource_tracker 管理:
+    否则任意一个 worker 退出时, tracker 会删除其他 worker 仍在使用的共享内存
+    """
+    create = size > 0
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(
+            name=name, create=create, size=size, track=False
+        )
+    shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+    if os.name == "posix":
+        # 3.13 之前没有 track 参数, 创建与打开时都会注册, 需要手动取消
+        from multiprocessing import resource_tracker
+
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+# crc32, key hash, expires_at, length
+_SLOT_HEADER = struct.Struct("<I16sdH")
+
+
+class SharedMemoryBackend:
+    """
+    同一主机多个 worker 共享的直接映射缓存, 哈希冲突时直接覆盖旧条目,
+    因此任何条目 (包括吊销标记) 都可能丢失, 只能用于加速.
+    不加锁: 并发写入造成的撕裂数据会因 crc32 校验失败而被视为未命中.
+    """
+
+    slot_size = 512
+
+    def __init__(self, name: str, slots: int) -> None:
+        try:
+            self._shm = _open_shared_memory(name, slots * self.slot_size)
+        except FileExistsError:
+            self._shm = _open_shared_memory(name)
+        self._slots = self._shm.size // self.slot_size
+        self._max_value = self.slot_size - _SLOT_HEADER.size
+
+    def _locate(self, key: str) -> tuple[int, bytes]:
+        digest = blake2b(key.encode(), digest_size=16).digest()
+        index = int.from_bytes(digest[:8], "little") % self._slots
+        return index * self.slot_size, digest
+
+    def _read(self, key: str) -> t.Optional[bytes]:
+        offset, digest = self._locate(key)
+        buf = self._shm.buf
+        crc, key_hash, expires_at, length = _SLOT_HEADER.unpack_from(buf, offset)
+        if key_hash != digest or expires_at < time() or length > self._max_value:
+            return None
+        end = offset + _SLOT_HEADER.size + length
+        if zlib.crc32(buf[offset + 4 : end]) != crc:
+            return None
+        return bytes(buf[offset + _SLOT_HEADER.size : end])
+
+    async def get_many(self, keys: t.Sequence[str]) -> list[t.Optional[bytes]]:
+        return [self._read(key) for key in keys]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        if len(value) > self._max_value:
+            return
+        offset, digest = self._locate(key)
+        body = _SLOT_HEADER.pack(0, digest, time() + ttl, len(value))[4:] + value
+        self._shm.buf[offset + 4 : offset + 4 + len(body)] = body
+        struct.pack_into("<I", self._shm.buf, offset, zlib.crc32(body))
+
+    async def delete(self, key: str) -> None:
+        offset, digest = self._locate(key)
+        if self._shm.buf[offset + 4 : offset + 20] == digest:
+            self._shm.buf[offset : offset + _SLOT_HEADER.size] = bytes(
+                _SLOT_HEADER.size
+            )
+
+    async def close(self) -> None:
+        self._shm.close()
+
+
+class _LocalEntry(t.NamedTuple):
+    digest: bytes
+    user_id: UUID
+    expires_at: float
+    identity: t.Any
+
+
+class IdentityCache:
+    """
+    以 jti 为键的两级身份缓存:
+    - 本地层: 进程内 LRU, 保存已构造好的身份对象
+    - 共享层 (可选): 保存已验证的 token 声明, 其他 worker 命中时无需再次验证签名
+    每个条目都记录 token 摘要, 伪造相同 jti 的 token 不会命中缓存.
+    两层中的用户信息都只在加载后 ``local_ttl`` 秒内有效, 之后需要重新读取数据库,
+    共享层的条目与吊销标记被覆盖或淘汰时, 吊销最多延迟 ``local_ttl`` 秒生效
+    """
+
+    token_prefix = "nazo:jti:"
+    revoke_prefix = "nazo:revoked:"
+
+    def __init__(
+        self,
+        settings: AuthCache,
+        backend: t.Optional[CacheBackend],
+        max_token_ttl: int,
+    ) -> None:
+        self.settings = settings
+        self.backend = backend
+        self.max_token_ttl = max_token_ttl
+        self._local: OrderedDict[str, _LocalEntry] = OrderedDict()
+        self._user_index: dict[UUID, set[str]] = {}
+        self._revoked: dict[UUID, int] = {}
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return blake2b(token.encode(), digest_size=16).digest()
+
+    def _evict(self, key: str) -> None:
+        entry = self._local.pop(key, None)
+        if entry is None:
+            return
+        keys = self._user_index.get(entry.user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._user_index[entry.user_id]
+
+    def get_local(self, key: str, digest: bytes) -> t.Any:
+        entry = self._local.get(key)
+        if entry is None or entry.digest != digest:
+            return None
+        if entry.expires_at <= time():
+            self._evict(key)
+            return None
+        self._local.move_to_end(key)
+        return entry.identity
+
+    async def lookup_shared(
+        self, key: str, user_id: UUID, digest: bytes
+    ) -> tuple[t.Optional[bytes], int]:
+        """
+        一次往返同时读取 token 条目与该用户的吊销时间戳
+
+        Returns:
+            tuple: (共享层保存的值, 吊销时间 (毫秒); 没有则为 0)
+        """
+        if self.backend is None:
+            return None, 0
+        try:
+            value, revoked = await self.backend.get_many(
+                [self.token_prefix + key, self.revoke_prefix + str(user_id)]
+            )
+        except Exception as e:
+            logger.warning(f"Shared identity cache unavailable: {e}")
+            return None, 0
+        revoked_at = int(revoked) if revoked else 0
+        if value is None or value[:16] != digest:
+            return None, revoked_at
+        return value[16:], revoked_at
+
+    def is_fresh(self, loaded_at: float) -> bool:
+        """
+        ``loaded_at`` (秒) 时从数据库加载的用户信息是否仍可使用
+        """
+        return loaded_at + self.settings.local_ttl > time()
+
+    def is_revoked(self, user_id: UUID, issued_at: int, revoked_at: int = 0) -> bool:
+        """
+        在吊销时间之前签发的 token 均视为无效, 时间单位为毫秒
+        """
+        return issued_at <= max(self._revoked.get(user_id, 0), revoked_at)
+
+    async def set(
+        self,
+        key: str,
+        user_id: UUID,
+        digest: bytes,
+        expires_at: float,
+        identity: t.Any,
+        shared_value: t.Optional[bytes] = None,
+        loaded_at: t.Optional[float] = None,
+    ) -> None:
+        """
+        ``loaded_at`` 为 ``identity`` 中用户信息的加载时间, 默认为当前时间;
+        本地条目不会比该时间之后的 ``local_ttl`` 秒存活更久
+        """
+        now = time()
+        if expires_at <= now:
+            return
+        self._evict(key)
+        self._local[key] = _LocalEntry(
+            digest=digest,
+            user_id=user_id,
+            expires_at=min(
+                expires_at,
+                (now if loaded_at is None else loaded_at) + self.settings.local_ttl,
+            ),
+            identity=identity,
+        )
+        self._user_index.setdefault(user_id, set()).add(key)
+        while len(self._local) > self.settings.local_maxsize:
+            self._evict(next(iter(self._local)))
+
+        if self.backend is not None and shared_value is not None:
+            try:
+                await self.backend.set(
+                    self.token_prefix + key, digest + shared_value, expires_at - now
+                )
+            except Exception as e:
+                logger.warning(f"Shared identity cache unavailable: {e}")
+
+    async def invalidate_user(self, user_id: UUID, revoked_at: int) -> None:
+        """
+        用户被停用或修改密码后调用: 清除本进程中该用户的条目,
+        并吊销 ``revoked_at`` (毫秒) 之前签发的全部 token.
+        调用方同时将吊销时间写入数据库 (``User.tokens_revoked_at``).
+        共享层的吊销标记只是加速, 可能被覆盖或淘汰; 其他 worker 缓存的用户信息
+        最多在 ``local_ttl`` 秒后重新从数据库加载, 届时必定感知吊销
+        """
+        horizon = revoked_at - self.max_token_ttl * 1000
+        self._revoked = {uid: ts for uid, ts in self._revoked.items() if ts > horizon}
+        self._revoked[user_id] = max(self._revoked.get(user_id, 0), revoked_at)
+        for key in list(self._user_index.get(user_id, ())):
+            self._evict(key)
+
+        if self.backend is not None:
+            try:
+                await self.backend.set(
+                    self.revoke_prefix + str(user_id),
+                    str(revoked_at).encode(),
+                    self.max_token_ttl,
+                )
+            except Exception as e:
+                logger.warning(f"Failed to publish revocation for {user_id}: {e}")
+
+    async def close(self) -> None:
+        if self.backend is not None:
+            await self.backend.close()
+
+
+def _create_backend(settings: AuthCache) -> t.Optional[CacheBackend]:
+    if settings.backend == "redis":
+        return RedisBackend(settings.redis_url)
+    if settings.backend == "shm":
+        return SharedMemoryBackend(settings.shm_name, settings.shm_slots)
+    return None
+
+
+_cache: t.Optional[IdentityCache] = None
+
+
+def get_identity_cache() -> IdentityCache:
+    global _cache
+    if _cache is None:
+        settings = load_settings()
+        _cache = IdentityCache(
+            settings=settings.auth_cache,
+            backend=_create_backend(settings.auth_cache),
+            max_token_ttl=settings.jwt.expire_timedelta,
+        )
+    return _cache
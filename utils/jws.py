@@ -0,0 +1,145 @@
+import binascii
+import typing as t
+from time import time
+
+from cryptography.exceptions import InvalidSignature
+from msgspec import UNSET, DecodeError, Struct, UnsetType, ValidationError
+from uuid_utils.compat import UUID
+
+from utils.codecs import ENCODER, json_decoder
+from utils.keyring import KeyRing, SigningKey
+
+_TO_URLSAFE = bytes.maketrans(b"+/", b"-_")
+_FROM_URLSAFE = bytes.maketrans(b"-_", b"+/")
+
+
+def b64url_encode(data: bytes) -> bytes:
+    return binascii.b2a_base64(data, newline=False).translate(_TO_URLSAFE).rstrip(b"=")
+
+
+def b64url_decode(data: bytes) -> bytes:
+    return binascii.a2b_base64(data.translate(_FROM_URLSAFE) + b"=" * (-len(data) % 4))
+
+
+class JWSHeader(Struct):
+    alg: str
+    kid: t.Optional[str] = None
+
+
+class VerifiedClaims(Struct):
+    """
+    与 PyJWT ``require=["exp", "iss", "sub"]`` 相同的必填声明;
+    其余声明可选, 出现时同样会被校验
+    """
+
+    sub: UUID
+    iss: str
+    exp: int
+    iat: t.Union[int, UnsetType] = UNSET
+    nbf: t.Union[int, UnsetType] = UNSET
+    jti: t.Union[UUID, UnsetType] = UNSET
+    aud: t.Any = UNSET
+
+
+class JWTCodec:
+    """
+    直接基于 msgspec 与 cryptography 的 EdDSA compact JWS 编解码:
+    - 每个 kid 的 header 段只编码一次
+    - payload 由专用的 Encoder/Decoder 一次完成序列化, 不经过中间 dict
+    错误信息与之前基于 PyJWT 的实现保持一致
+    """
+
+    def __init__(self, keyring: KeyRing, issuer: str) -> None:
+        self.keyring = keyring
+        self.issuer = issuer
+        self._encoder = ENCODER
+        self._header_decoder = json_decoder(JWSHeader)
+        self._claims_decoder = json_decoder(VerifiedClaims)
+        self._header_segments: dict[str, bytes] = {}
+
+    def _header_segment(self, key: SigningKey) -> bytes:
+        segment = self._header_segments.get(key.kid)
+        if segment is None:
+            segment = b64url_encode(
+                self._encoder.encode({"alg": "EdDSA", "typ": "JWT", "kid": key.kid})
+            )
+            self._header_segments[key.kid] = segment
+        return segment
+
+    def encode(self, payload: Struct) -> str:
+        key = self.keyring.signing_key()
+        if key.private_key is None:
+            raise ValueError(f"Key {key.kid} cannot sign.")
+        signing_input = (
+            self._header_segment(key)
+            + b"."
+            + b64url_encode(self._encoder.encode(payload))
+        )
+        signature = b64url_encode(key.private_key.sign(signing_input))
+        return (signing_input + b"." + signature).decode("ascii")
+
+    def _keys_for(self, header: JWSHeader) -> list[SigningKey]:
+        if header.alg != "EdDSA":
+            raise ValueError("Invalid token.")
+        if header.kid is None:
+            # 轮换前签发的 token 没有 kid
+            return list(self.keyring.keys.values())
+        key = self.keyring.get(header.kid)
+        if key is None:
+            raise ValueError("Unknown signing key.")
+        return [key]
+
+    def decode(self, token: str) -> VerifiedClaims:
+        header, signing_input, signature, payload_bytes = self._split(token)
+        self._verify_signature(header, signing_input, signature)
+        try:
+            claims = self._claims_decoder.decode(payload_bytes)
+        except ValidationError as e:
+            if "missing required field" in str(e):
+                raise ValueError("Missing required claim.")
+            raise ValueError("Invalid token.")
+        except DecodeError:
+            raise ValueError("Invalid token.")
+        self._validate(claims)
+        return claims
+
+    def _split(self, token: str) -> tuple[JWSHeader, bytes, bytes, bytes]:
+        try:
+            raw = token.encode("ascii")
+            signing_input, _, signature_segment = raw.rpartition(b".")
+            header_segment, _, payload_segment = signing_input.partition(b".")
+            if not header_segment or not payload_segment or b"." in payload_segment:
+                raise ValueError("Invalid token.")
+            header = self._header_decoder.decode(b64url_decode(header_segment))
+            signature = b64url_decode(signature_segment)
+            payload_bytes = b64url_decode(payload_segment)
+        except (UnicodeEncodeError, binascii.Error, DecodeError):
+            raise ValueError("Invalid token.")
+        return header, signing_input, signature, payload_bytes
+
+    def _verify_signature(
+        self, header: JWSHeader, signing_input: bytes, signature: bytes
+    ) -> None:
+        for key in self._keys_for(header):
+            try:
+                key.public_key.verify(signature, signing_input)
+                break
+            except InvalidSignature:
+                continue
+        else:
+            raise ValueError("Invalid token.")
+
+    def _validate(self, claims: VerifiedClaims) -> None:
+        # 校验顺序与 PyJWT 相同: iat, nbf, exp, iss, aud
+        now = time()
+        if claims.iat is not UNSET and claims.iat > now:
+            raise ValueError("Invalid token.")
+        if claims.nbf is not UNSET and claims.nbf > now:
+            raise ValueError("Invalid token.")
+        if claims.exp <= now:
+            raise ValueError("Token has expired.")
+        if claims.iss != self.issuer:
+            raise ValueError("Invalid issuer.")
+        if claims.aud is not UNSET:
+            # 未指定 audience 时 PyJWT 会拒绝带 aud 的 token
+            raise ValueError("Invalid token.")
@@ -0,0 +1,208 @@
+import typing as t
+from base64 import urlsafe_b64encode
+from hashlib import sha256
+from pathlib import Path
+from time import monotonic, time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+
+from app.settings import BASE_DIR
+from utils.logging import get_logger
+
+logger = get_logger("jwt_service")
+
+
+class SigningKey(t.NamedTuple):
+    kid: str
+    public_key: ed25519.Ed25519PublicKey
+    private_key: t.Optional[ed25519.Ed25519PrivateKey]
+    # 文件修改时间; 轮换时会刷新旧 active 密钥的该时间, 作为其停止签名的时间
+    modified_at: float
+
+
+def key_id(public_key: ed25519.Ed25519PublicKey) -> str:
+    """
+    由公钥原始字节的 SHA-256 指纹生成 kid
+    """
+    raw = public_key.public_bytes(
+        encoding=serialization.Encoding.Raw, format=serialization.PublicFormat.Raw
+    )
+    return urlsafe_b64encode(sha256(raw).digest()[:12]).decode("ascii")
+
+
+class KeyRing:
+    """
+    Ed25519 密钥环, 目录结构:
+        secret/keys/<kid>.key   私钥 (可签名, 也可验证)
+        secret/keys/<kid>.pub   仅用于验证的公钥
+        secret/keys/active      当前签名密钥的 kid
+
+    轮换时生成新私钥并设为 active, 旧密钥保留用于验证, 已签发的 token 不会失效.
+    遇到未知 kid 时会重新扫描目录 (有节流), 其他 worker 无需重启即可识别新密钥.
+    """
+
+    reload_interval = 5.0
+
+    def __init__(self, secret_dir: Path = BASE_DIR.joinpath("secret")) -> None:
+        self.secret_dir = secret_dir
+        self.keys_dir = secret_dir.joinpath("keys")
+        self.active_path = self.keys_dir.joinpath("active")
+        self.keys: dict[str, SigningKey] = {}
+        self.active: SigningKey
+        self._last_reload = 0.0
+        self._active_mtime = 0.0
+
+        if not self.keys_dir.exists():
+            self.keys_dir.mkdir(parents=True, exist_ok=True)
+            logger.info(f"Created key directory at {self.keys_dir}")
+        self._import_legacy_key()
+        self.reload()
+        if not self.keys:
+            logger.info("Generating new Ed25519 key pair")
+            self.rotate()
+
+    def _import_legacy_key(self) -> None:
+        """
+        兼容旧版本的 ``secret/private.key``, 导入密钥环后继续用于签名与验证
+        """
+        legacy_path = self.secret_dir.joinpath("private.key")
+        if not legacy_path.exists() or any(self.keys_dir.glob("*.key")):
+            return
+        data = legacy_path.read_bytes()
+        private_key = t.cast(
+            ed25519.Ed25519PrivateKey,
+            serialization.load_pem_private_key(data=data, password=None),
+        )
+        kid = key_id(private_key.public_key())
+        self.keys_dir.joinpath(f"{kid}.key").write_bytes(data)
+        self.active_path.write_text(kid)
+        logger.info(f"Imported legacy private key as {kid}")
+
+    def _load(self, path: Path) -> SigningKey:
+        data = path.read_bytes()
+        private_key: t.Optional[ed25519.Ed25519PrivateKey] = None
+        if path.suffix == ".key":
+            private_key = t.cast(
+                ed25519.Ed25519PrivateKey,
+                serialization.load_pem_private_key(data=data, password=None),
+            )
+            public_key = private_key.public_key()
+        else:
+            public_key = t.cast(
+                ed25519.Ed25519PublicKey, serialization.load_pem_public_key(data)
+            )
+        return SigningKey(
+            kid=key_id(public_key),
+            public_key=public_key,
+            private_key=private_key,
+            modified_at=path.stat().st_mtime,
+        )
+
+    def reload(self) -> None:
+        self._last_reload = monotonic()
+        if self.active_path.exists():
+            self._active_mtime = self.active_path.stat().st_mtime
+        keys: dict[str, SigningKey] = {}
+        for path in sorted(self.keys_dir.iterdir()):
+            if path.suffix not in {".key", ".pub"}:
+                continue
+            try:
+                key = self._load(path)
+            except Exception as e:
+                logger.error(f"Failed to load key {path.name}: {e}")
+                continue
+            # 同一 kid 同时存在私钥与公钥时优先保留私钥
+            if key.kid not in keys or key.private_key is not None:
+                keys[key.kid] = key
+        if not keys:
+            return
+
+        signing = [key for key in keys.values() if key.private_key is not None]
+        active_kid = (
+            self.active_path.read_text().strip() if self.active_path.exists() else ""
+        )
+        if active_kid in keys and keys[active_kid].private_key is not None:
+            active = keys[active_kid]
+        elif signing:
+            active = max(signing, key=lambda key: key.modified_at)
+        else:
+            raise RuntimeError(f"No private key available in {self.keys_dir}")
+        self.keys, self.active = keys, active
+        logger.debug(f"Loaded {len(keys)} keys, active kid: {active.kid}")
+
+    def signing_key(self) -> SigningKey:
+        """
+        当前签名密钥; 其他进程执行轮换后, 最多 ``reload_interval`` 秒内切换到新密钥
+        """
+        if monotonic() - self._last_reload > self.reload_interval:
+            self._last_reload = monotonic()
+            if (
+                self.active_path.exists()
+                and self.active_path.stat().st_mtime != self._active_mtime
+            ):
+                self.reload()
+        return self.active
+
+    def get(self, kid: str) -> t.Optional[SigningKey]:
+        key = self.keys.get(kid)
+        if key is None and monotonic() - self._last_reload > self.reload_interval:
+            self.reload()
+            key = self.keys.get(kid)
+        return key
+
+    def rotate(self) -> SigningKey:
+        """
+        生成新的签名密钥并设为 active
+        """
+        if self.keys:
+            self.keys_dir.joinpath(f"{self.active.kid}.key").touch()
+        private_key = ed25519.Ed25519PrivateKey.generate()
+        kid = key_id(private_key.public_key())
+        path = self.keys_dir.joinpath(f"{kid}.key")
+        path.write_bytes(
+            private_key.private_bytes(
+                encoding=serialization.Encoding.PEM,
+                format=serialization.PrivateFormat.PKCS8,
+                encryption_algorithm=serialization.NoEncryption(),
+            )
+        )
+        self.active_path.write_text(kid)
+        logger.info(f"Private key saved to {path}")
+        self.reload()
+        return self.active
+
+    def prune(self, max_age: float) -> list[str]:
+        """
+        删除停止签名已超过 ``max_age`` 秒的非 active 密钥.
+        ``max_age`` 应不小于 token 有效期, 否则仍有效的 token 将无法验证
+        """
+        removed = []
+        threshold = time() - max_age
+        for kid, key in list(self.keys.items()):
+            if kid == self.active.kid or key.modified_at >= threshold:
+                continue
+            for suffix in (".key", ".pub"):
+                self.keys_dir.joinpath(f"{kid}{suffix}").unlink(missing_ok=True)
+            removed.append(kid)
+        if removed:
+            self.reload()
+        return removed
+
+
+if __name__ == "__main__":
+    import sys
+
+    from app.settings import load_settings
+
+    keyring = KeyRing()
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    if command == "rotate":
+        print(f"active kid: {keyring.rotate().kid}")
+    elif command == "prune":
+        removed = keyring.prune(load_settings().jwt.expire_timedelta)
+        print(f"removed: {', '.join(removed) or '-'}")
+    else:
+        for kid, key in keyring.keys.items():
+            flag = "*" if kid == keyring.active.kid else " "
+            print(f"{flag} {kid} {'private' if key.private_key else 'public'}")
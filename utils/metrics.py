@@ -0,0 +1,64 @@
+import typing as t
+from bisect import bisect_left
+
+from msgspec import Struct, to_builtins
+
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+MetricsProvider = t.Callable[[], t.Any]
+
+_providers: dict[str, MetricsProvider] = {}
+
+
+def register_metrics(name: str, provider: MetricsProvider) -> None:
+    """
+    注册一个指标来源, 内部指标接口会在请求时调用它.
+    同名注册会覆盖之前的来源
+    """
+    _providers[name] = provider
+
+
+def collect_metrics() -> dict[str, t.Any]:
+    metrics: dict[str, t.Any] = {}
+    for name, provider in _providers.items():
+        try:
+            metrics[name] = to_builtins(provider())
+        except Exception as e:
+            logger.warning(f"Failed to collect metrics `{name}`: {e}")
+    return metrics
+
+
+class HistogramSnapshot(Struct):
+    count: int
+    sum_ms: float
+    # 每个桶的上界 (毫秒) 与累计计数, 最后一个桶为 +Inf
+    buckets: list[tuple[str, int]]
+
+
+class Histogram:
+    """
+    固定桶的延迟直方图, 单位为毫秒
+    """
+
+    default_bounds = (0.1, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+    def __init__(self, bounds: t.Sequence[float] = default_bounds) -> None:
+        self.bounds = tuple(bounds)
+        self._counts = [0] * (len(self.bounds) + 1)
+        self._sum = 0.0
+
+    def observe(self, value_ms: float) -> None:
+        self._counts[bisect_left(self.bounds, value_ms)] += 1
+        self._sum += value_ms
+
+    def snapshot(self) -> HistogramSnapshot:
+        buckets = []
+        cumulative = 0
+        for bound, count in zip((*self.bounds, "+Inf"), self._counts):
+            cumulative += count
+            buckets.append((str(bound), cumulative))
+        return HistogramSnapshot(
+            count=cumulative, sum_ms=round(self._sum, 3), buckets=buckets
+        )
@@ -0,0 +1,199 @@
+import hmac
+import os
+import secrets
+import typing as t
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime, timedelta, timezone
+from hashlib import sha256
+from uuid import UUID
+
+from blacksheep.exceptions import BadRequest
+from msgspec import DecodeError, ValidationError
+from piccolo.columns import Column
+from piccolo.query import Select
+from piccolo.columns.combination import WhereRaw
+
+from app.settings import BASE_DIR
+from utils.codecs import MSGPACK_ENCODER, msgpack_decoder
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+_SIGNATURE_SIZE = 16
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+Direction = t.Literal["next", "prev"]
+
+
+class Cursor(t.NamedTuple):
+    """
+    游标指向一行数据的排序键 ``(created_at, id)``,
+    ``direction`` 表示从该行向后 (更旧) 还是向前 (更新) 翻页
+    """
+
+    created_at: datetime
+    id: UUID
+    direction: Direction = "next"
+
+
+class RankCursor(t.NamedTuple):
+    """
+    全文搜索结果的游标, 指向一行的排序键 ``(rank, id)``, 只支持向后翻页
+    """
+
+    rank: float
+    id: UUID
+
+
+class CursorCodec:
+    """
+    将 ``Cursor`` 编码为不透明且带 HMAC 签名的字符串, 防止客户端伪造排序键
+    """
+
+    def __init__(self, key: t.Optional[bytes] = None) -> None:
+        self._key = key or self._load_key()
+        self._encoder = MSGPACK_ENCODER
+        self._decoder = msgpack_decoder(tuple[int, bytes, Direction])
+        self._rank_decoder = msgpack_decoder(tuple[float, bytes])
+
+    @staticmethod
+    def _load_key() -> bytes:
+        secret_dir = BASE_DIR.joinpath("secret")
+        key_path = secret_dir.joinpath("cursor.key")
+        if not key_path.exists():
+            secret_dir.mkdir(parents=True, exist_ok=True)
+            # 多个 worker 同时启动时只能有一个密钥生效:
+            # 先写入临时文件, 再以 link 原子发布, 已存在时使用其他 worker 写入的密钥
+            tmp_path = secret_dir.joinpath(f"cursor.key.{os.getpid()}")
+            tmp_path.write_bytes(secrets.token_bytes(32))
+            try:
+                os.link(tmp_path, key_path)
+                logger.info(f"Cursor signing key saved to {key_path}")
+            except FileExistsError:
+                pass
+            finally:
+                tmp_path.unlink()
+        return key_path.read_bytes()
+
+    def _sign(self, body: bytes) -> bytes:
+        return hmac.new(self._key, body, sha256).digest()[:_SIGNATURE_SIZE]
+
+    def _seal(self, body: bytes) -> str:
+        raw = self._sign(body) + body
+        return urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+    def _open(self, value: str) -> bytes:
+        try:
+            raw = urlsafe_b64decode(value + "=" * (-len(value) % 4))
+        except ValueError as e:
+            raise BadRequest("Invalid cursor.") from e
+        signature, body = raw[:_SIGNATURE_SIZE], raw[_SIGNATURE_SIZE:]
+        if not hmac.compare_digest(signature, self._sign(body)):
+            raise BadRequest("Invalid cursor.")
+        return body
+
+    def encode(self, cursor: Cursor) -> str:
+        micros = (cursor.created_at - _EPOCH) // timedelta(microseconds=1)
+        return self._seal(
+            self._encoder.encode((micros, cursor.id.bytes, cursor.direction))
+        )
+
+    def decode(self, value: str) -> Cursor:
+        body = self._open(value)
+        try:
+            micros, id_bytes, direction = self._decoder.decode(body)
+            return Cursor(
+                created_at=_EPOCH + timedelta(microseconds=micros),
+                id=UUID(bytes=id_bytes),
+                direction=direction,
+            )
+        except (DecodeError, ValidationError, ValueError) as e:
+            raise BadRequest("Invalid cursor.") from e
+
+    def encode_rank(self, cursor: RankCursor) -> str:
+        return self._seal(self._encoder.encode((cursor.rank, cursor.id.bytes)))
+
+    def decode_rank(self, value: str) -> RankCursor:
+        body = self._open(value)
+        try:
+            rank, id_bytes = self._rank_decoder.decode(body)
+            return RankCursor(rank=rank, id=UUID(bytes=id_bytes))
+        except (DecodeError, ValidationError, ValueError) as e:
+            raise BadRequest("Invalid cursor.") from e
+
+
+_codec: t.Optional[CursorCodec] = None
+
+
+def get_cursor_codec() -> CursorCodec:
+    global _codec
+    if _codec is None:
+        _codec = CursorCodec()
+    return _codec
+
+
+class Page(t.NamedTuple):
+    rows: list[dict[str, t.Any]]
+    next: t.Optional[str]
+    prev: t.Optional[str]
+
+
+async def keyset_paginate(
+    query: Select,
+    order_column: Column,
+    id_column: Column,
+    size: int,
+    cursor: t.Optional[Cursor] = None,
+    offset: int = 0,
+    node: t.Optional[str] = None,
+) -> Page:
+    """
+    按 ``(order_column, id_column)`` 倒序分页.
+    提供 ``cursor`` 时使用行比较 (keyset) 定位, 与翻页深度无关;
+    否则退回 ``offset``, 仅用于兼容旧的 ``page`` 参数.
+    ``node`` 为执行查询的数据库节点, 见 ``ReplicaRouter``.
+    """
+    codec = get_cursor_codec()
+    order_key, id_key = order_column._meta.name, id_column._meta.name
+    backwards = cursor is not None and cursor.direction == "prev"
+
+    if cursor is not None:
+        operator = ">" if backwards else "<"
+        query = query.where(
+            WhereRaw(
+                f"({order_column._meta.get_full_name(with_alias=False)}, "
+                f"{id_column._meta.get_full_name(with_alias=False)}) "
+                f"{operator} ({{}}, {{}})",
+                cursor.created_at,
+                cursor.id,
+            )
+        )
+    elif offset:
+        query = query.offset(offset)
+
+    rows = (
+        await query.order_by(order_column, id_column, ascending=backwards)
+        .limit(size + 1)
+        .run(node=node)
+    )
+    has_more = len(rows) > size
+    rows = rows[:size]
+    if not rows:
+        return Page(rows=rows, next=None, prev=None)
+    if backwards:
+        rows.reverse()
+
+    def make(row: dict[str, t.Any], direction: Direction) -> str:
+        return codec.encode(Cursor(row[order_key], row[id_key], direction))
+
+    if backwards:
+        return Page(
+            rows=rows,
+            next=make(rows[-1], "next"),
+            prev=make(rows[0], "prev") if has_more else None,
+        )
+    return Page(
+        rows=rows,
+        next=make(rows[-1], "next") if has_more else None,
+        prev=make(rows[0], "prev") if cursor is not None or offset else None,
+    )
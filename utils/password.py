@@ -0,0 +1,148 @@
+import asyncio
+import os
+import typing as t
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from time import perf_counter
+
+from argon2 import PasswordHasher
+from argon2.exceptions import VerifyMismatchError
+from blacksheep.exceptions import HTTPException
+from msgspec import Struct
+
+from app.settings import PasswordHashing, load_settings
+from utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+_ph = PasswordHasher()
+
+T = t.TypeVar("T")
+
+
+# 以下两个函数会在工作线程/进程中执行, 必须位于模块顶层以便 pickle
+def _hash(password: str) -> str:
+    return _ph.hash(password)
+
+
+def _verify(hashed: str, password: str) -> bool:
+    try:
+        return _ph.verify(hashed, password)
+    except VerifyMismatchError:
+        return False
+
+
+class PasswordHasherBusy(HTTPException):
+    """
+    哈希工作池已满, 拒绝新的任务
+    """
+
+    def __init__(
+        self, message: str = "Password hashing service is busy, please retry later."
+    ) -> None:
+        super().__init__(503, message)
+
+
+class PasswordHasherStats(Struct):
+    executor: str
+    max_workers: int
+    max_pending: int
+    pending: int
+    running: int
+    queued: int
+    completed: int
+    rejected: int
+    busy_seconds: float
+
+
+class PasswordHashingService:
+    """
+    在独立的线程池/进程池中执行 Argon2 的 hash 与 verify, 避免阻塞事件循环.
+    排队任务数量超过 ``max_pending`` 时抛出 ``PasswordHasherBusy`` (503).
+    """
+
+    def __init__(self, settings: PasswordHashing) -> None:
+        self.settings = settings
+        self.max_workers = settings.max_workers or min(os.cpu_count() or 1, 8)
+        self._executor: t.Optional[Executor] = None
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._busy_seconds = 0.0
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.settings.executor == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="argon2"
+                )
+            logger.info(
+                f"Password hashing {self.settings.executor} pool started "
+                f"with {self.max_workers} workers"
+            )
+        return self._executor
+
+    async def _submit(self, fn: t.Callable[..., T], *args: t.Any) -> T:
+        if self._pending >= self.settings.max_pending:
+            self._rejected += 1
+            raise PasswordHasherBusy()
+        self._pending += 1
+        start = perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, fn, *args
+            )
+        finally:
+            self._pending -= 1
+            self._completed += 1
+            self._busy_seconds += perf_counter() - start
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(_hash, password)
+
+    async def verify(self, hashed: str, password: str) -> bool:
+        """
+        密码不匹配时返回 ``False``, 存储的 hash 格式错误时抛出 ``InvalidHash``
+        """
+        return await self._submit(_verify, hashed, password)
+
+    def hash_sync(self, password: str) -> str:
+        """
+        同步 hash, 仅用于无法 await 的场景 (例如 ``User.__setattr__``)
+        """
+        return _hash(password)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        # 只解析 hash 参数, 开销很小, 无需放入工作池
+        return _ph.check_needs_rehash(hashed)
+
+    def stats(self) -> PasswordHasherStats:
+        running = min(self._pending, self.max_workers)
+        return PasswordHasherStats(
+            executor=self.settings.executor,
+            max_workers=self.max_workers,
+            max_pending=self.settings.max_pending,
+            pending=self._pending,
+            running=running,
+            queued=self._pending - running,
+            completed=self._completed,
+            rejected=self._rejected,
+            busy_seconds=self._busy_seconds,
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_service: t.Optional[PasswordHashingService] = None
+
+
+def get_password_service() -> PasswordHashingService:
+    global _service
+    if _service is None:
+        _service = PasswordHashingService(load_settings().password)
+    return _service
@@ -0,0 +1,64 @@
+import typing as t
+from collections import Counter, OrderedDict
+from time import monotonic
+
+from utils.logging import get_logger
+
+logger = get_logger("jwt_auth")
+
+
+class NegativeCache:
+    """
+    记录最近被拒绝的 token 摘要及原因, 短时间内重复出现时直接拒绝,
+    不再进行签名验证与数据库查询
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[bytes, tuple[float, str]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, digest: bytes) -> t.Optional[str]:
+        entry = self._entries.get(digest)
+        if entry is None:
+            return None
+        expires_at, reason = entry
+        if expires_at <= monotonic():
+            del self._entries[digest]
+            return None
+        return reason
+
+    def add(self, digest: bytes, reason: str) -> None:
+        self._entries[digest] = (monotonic() + self.ttl, reason)
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+class FailureCounter:
+    """
+    按原因统计认证失败次数, 每隔 ``interval`` 秒汇总输出一条日志,
+    避免每次失败都写一行日志
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.totals: Counter[str] = Counter()
+        self._window: Counter[str] = Counter()
+        self._window_start = monotonic()
+
+    def record(self, reason: str) -> None:
+        self.totals[reason] += 1
+        self._window[reason] += 1
+        now = monotonic()
+        if now - self._window_start < self.interval:
+            return
+        logger.warning(
+            f"Rejected {sum(self._window.values())} tokens in the last "
+            f"{int(now - self._window_start)}s: {dict(self._window)}"
+        )
+        self._window.clear()
+        self._window_start = now
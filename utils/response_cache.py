@@ -0,0 +1,222 @@
+import typing as t
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from hashlib import blake2b
+from time import monotonic
+
+from blacksheep import Content, Request, Response
+from msgspec import Struct
+
+from app.settings import HttpCache, load_settings
+from utils.compression import get_precompressed_cache
+from utils.db_replicas import get_replica_router
+from utils.metrics import register_metrics
+from utils.responses import JSON_CONTENT_TYPE
+from utils.singleflight import SingleFlight
+
+
+class CachedBody(t.NamedTuple):
+    """
+    构建函数的返回值: 已编码的响应体与最后修改时间.
+    只有 200 响应会被缓存并带有 ETag
+    """
+
+    body: bytes
+    last_modified: t.Optional[datetime] = None
+    status: int = 200
+
+
+class _Entry(t.NamedTuple):
+    status: int
+    body: bytes
+    etag: bytes
+    last_modified: t.Optional[datetime]
+    expires_at: float
+
+
+class ResponseCacheStats(Struct):
+    size: int
+    hits: int
+    misses: int
+    not_modified: int
+    invalidations: int
+    bypassed: int
+
+
+Builder = t.Callable[[], t.Awaitable[CachedBody]]
+
+
+def _etag_matches(header: bytes, etag: bytes) -> bool:
+    """
+    ``If-None-Match`` 使用弱比较, 忽略 ``W/`` 前缀
+    """
+    if header.strip() == b"*":
+        return True
+    return any(
+        candidate.strip().removeprefix(b"W/") == etag
+        for candidate in header.split(b",")
+    )
+
+
+def _not_modified_since(header: bytes, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header.decode("latin-1"))
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def _is_not_modified(
+    request: Request, etag: bytes, last_modified: t.Optional[datetime]
+) -> bool:
+    # 同时存在时以 If-None-Match 为准 (RFC 9110 13.1.3)
+    if_none_match = request.get_first_header(b"If-None-Match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.get_first_header(b"If-Modified-Since")
+    if if_modified_since is not None and last_modified is not None:
+        return _not_modified_since(if_modified_since, last_modified)
+    return False
+
+
+class ResponseCache:
+    """
+    按 路由名 + 路径与查询参数 缓存已编码的 JSON 响应体 (LRU + TTL):
+    - 为响应体计算强 ETag, 并支持 ``If-None-Match`` / ``If-Modified-Since`` 返回 304
+    - 同一键的并发未命中只构建一次
+    - 数据变更时调用 ``invalidate``; 失效前开始构建的结果不会写入缓存
+    - 与 ``ReplicaRouter`` 的 read-your-writes 配合: 处于写入窗口内的用户绕过缓存,
+      任何用户处于写入窗口内时 (副本可能落后) 构建的结果不写入缓存
+    """
+
+    def __init__(self, settings: HttpCache) -> None:
+        self.settings = settings
+        self._entries: OrderedDict[tuple[str, bytes], _Entry] = OrderedDict()
+        self._inflight: SingleFlight[_Entry] = SingleFlight()
+        self._generation = 0
+        self._hits = self._misses = self._not_modified = self._invalidations = 0
+        self._bypassed = 0
+
+    def _get(self, key: tuple[str, bytes]) -> t.Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def _build(self, key: tuple[str, bytes], build: Builder) -> _Entry:
+        generation = self._generation
+        result = await build()
+        entry = _Entry(
+            status=result.status,
+            body=result.body,
+            etag=b'"%s"' % blake2b(result.body, digest_size=16).hexdigest().encode(),
+            last_modified=result.last_modified,
+            expires_at=monotonic() + self.settings.ttl,
+        )
+        if (
+            result.status == 200
+            and generation == self._generation
+            and len(result.body) <= self.settings.max_entry_size
+            and not get_replica_router().has_pins
+        ):
+            self._entries[key] = entry
+            # 条目有效期内响应体不变, 压缩结果可以复用
+            get_precompressed_cache().register(entry.body)
+            while len(self._entries) > self.settings.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    async def respond(
+        self,
+        request: Request,
+        route: str,
+        build: Builder,
+        pin_key: t.Optional[t.Hashable] = None,
+    ) -> Response:
+        """
+        ``pin_key`` 为当前用户在 ``ReplicaRouter`` 中的键 (用户 id)
+        """
+        if not self.settings.enabled or get_replica_router().is_pinned(pin_key):
+            self._bypassed += 1
+            result = await build()
+            return self._response(request, route, result.status, result.body)
+
+        key = (route, request.url.value)
+        entry = self._get(key)
+        if entry is None:
+            self._misses += 1
+            entry = await self._inflight.do(
+                (key, self._generation), lambda: self._build(key, build)
+            )
+        else:
+            self._hits += 1
+        if entry.status != 200:
+            return self._response(request, route, entry.status, entry.body)
+        return self._response(
+            request, route, entry.status, entry.body, entry.etag, entry.last_modified
+        )
+
+    def _response(
+        self,
+        request: Request,
+        route: str,
+        status: int,
+        body: bytes,
+        etag: t.Optional[bytes] = None,
+        last_modified: t.Optional[datetime] = None,
+    ) -> Response:
+        headers: list[tuple[bytes, bytes]] = []
+        cache_control = self.settings.cache_control.get(route)
+        if cache_control and status == 200:
+            headers.append((b"Cache-Control", cache_control.encode()))
+        if etag is not None:
+            headers.append((b"ETag", etag))
+        if last_modified is not None:
+            headers.append(
+                (
+                    b"Last-Modified",
+                    format_datetime(
+                        last_modified.astimezone(timezone.utc), usegmt=True
+                    ).encode(),
+                )
+            )
+
+        if etag is not None and _is_not_modified(request, etag, last_modified):
+            self._not_modified += 1
+            return Response(304, headers=headers)
+        return Response(
+            status, headers=headers, content=Content(JSON_CONTENT_TYPE, body)
+        )
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._invalidations += 1
+        self._entries.clear()
+
+    def stats(self) -> ResponseCacheStats:
+        return ResponseCacheStats(
+            size=len(self._entries),
+            hits=self._hits,
+            misses=self._misses,
+            not_modified=self._not_modified,
+            invalidations=self._invalidations,
+            bypassed=self._bypassed,
+        )
+
+
+_cache: t.Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache(load_settings().http_cache)
+        register_metrics("response_cache", _cache.stats)
+    return _cache
@@ -1,15 +1,18 @@
 import typing as t
+from collections import Counter, OrderedDict
 from enum import IntEnum
 from msgspec import json, Struct, UNSET, UnsetType
 from blacksheep import Content, Response
 
-ENCODER = json.Encoder()
-DECODER = json.Decoder()
+from utils.codecs import ENCODER
 
 JSON_CONTENT_TYPE = b"application/json"
 
 HeaderType = tuple[bytes, bytes]
 
+T = t.TypeVar("T")
+S = t.TypeVar("S", bound=Struct)
+
 
 def jsonify(
     data: "ApiResponse",
@@ -19,6 +22,8 @@ def jsonify(
     """
     Returns a response with application/json content,
     and given status (default HTTP 200 OK).
+    The body is encoded once directly to ``bytes``; ``Content`` keeps a
+    reference until the response is sent, so a reused buffer cannot be used.
     """
     return Response(
         status=status,
@@ -59,12 +64,95 @@ class StatusCode(IntEnum):
     SERVER_EXCEPTION = 1008  # 服务器异常
     RANGE_NOT_SATISFIABLE = 1009  # 范围不满足
     FORBIDDEN = 1010  # 禁止访问
+    SERVICE_BUSY = 1011  # 服务繁忙
+    PAYLOAD_TOO_LARGE = 1012  # 请求体过大
     # 用户相关状态码 (2000 - 2999)
     USER_NOT_FOUND = 2001  # 用户未找到
     USER_OR_PASSWORD_ERROR = 2002  # 用户或密码错误
 
 
-class ApiResponse(Struct):
+class PageMeta(Struct, omit_defaults=True):
+    size: int
+    next: t.Optional[str] = None  # 下一页 (更旧) 游标
+    prev: t.Optional[str] = None  # 上一页 (更新) 游标
+    total: t.Optional[int] = None  # 总数, 取决于路由的统计方式, 可能不返回
+    estimated: bool = False  # total 是否为估算值
+
+
+class ApiResponse(Struct, t.Generic[T]):
     code: int = StatusCode.SUCCESS
-    data: t.Union[str, list[t.Any], dict[t.Any, t.Any], UnsetType] = UNSET
+    data: t.Union[T, UnsetType] = UNSET
     message: t.Union[str, UnsetType] = UNSET
+    meta: t.Union[PageMeta, UnsetType] = UNSET
+
+
+def to_structs(rows: t.Iterable[t.Mapping[str, t.Any]], type: t.Type[S]) -> list[S]:
+    """
+    将 Piccolo ``select()`` 结果 (dict) 或 asyncpg ``Record`` 直接构造为 Struct 列表,
+    数据库返回的类型已经正确, 因此跳过 ``msgspec.convert`` 的校验开销.
+    多余的列会被忽略, 缺少字段时抛出 ``KeyError``
+    """
+    fields = type.__struct_fields__
+    return [type(*[row[name] for name in fields]) for row in rows]
+
+
+def to_struct(row: t.Mapping[str, t.Any], type: t.Type[S]) -> S:
+    return type(*[row[name] for name in type.__struct_fields__])
+
+
+class ErrorResponder:
+    """
+    错误响应体的复用与统计:
+    - ``prepare`` 注册的默认消息在启动时编码一次, 之后直接复用同一份 bytes
+    - 其他消息首次出现时编码, 最近使用的 ``maxsize`` 条会被保留,
+      认证失败等重复出现的消息不需要每次重新编码
+    - 按 ``状态码:业务码`` 统计错误响应数量
+    """
+
+    def __init__(self, maxsize: int = 256) -> None:
+        self.maxsize = maxsize
+        self.counts: Counter[str] = Counter()
+        self._static: dict[tuple[int, str], bytes] = {}
+        self._dynamic: OrderedDict[tuple[int, str], bytes] = OrderedDict()
+
+    @staticmethod
+    def encode(code: StatusCode, message: str) -> bytes:
+        return ENCODER.encode(ApiResponse(code=code, message=message))
+
+    def prepare(self, code: StatusCode, *messages: str) -> None:
+        for message in messages:
+            self._static[(code, message)] = self.encode(code, message)
+
+    def body(self, code: StatusCode, message: str) -> bytes:
+        key = (code, message)
+        body = self._static.get(key)
+        if body is not None:
+            return body
+        body = self._dynamic.get(key)
+        if body is None:
+            body = self.encode(code, message)
+            self._dynamic[key] = body
+            if len(self._dynamic) > self.maxsize:
+                self._dynamic.popitem(last=False)
+        else:
+            self._dynamic.move_to_end(key)
+        return body
+
+    def respond(
+        self,
+        status: int,
+        code: StatusCode,
+        message: str,
+        headers: t.Optional[t.List[HeaderType]] = None,
+    ) -> Response:
+        self.counts[f"{status}:{code.name}"] += 1
+        return Response(
+            status=status,
+            headers=headers,
+            content=Content(
+                content_type=JSON_CONTENT_TYPE, data=self.body(code, message)
+            ),
+        )
+
+    def stats(self) -> dict[str, int]:
+        return dict(self.counts)
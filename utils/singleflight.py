@@ -0,0 +1,36 @@
+import asyncio
+import typing as t
+
+T = t.TypeVar("T")
+
+
+class SingleFlight(t.Generic[T]):
+    """
+    合并同一时刻针对相同键的并发调用: 只有第一个调用者真正执行,
+    其余调用者等待同一个结果, 异常也会原样传递给所有等待者.
+    调用完成后立即移除该键, 不会缓存结果.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[t.Hashable, asyncio.Task[T]] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(
+        self, key: t.Hashable, fn: t.Callable[[], t.Coroutine[t.Any, t.Any, T]]
+    ) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+        # shield: 某个等待者被取消时, 不影响其他等待者共享的任务
+        return await asyncio.shield(task)
+
+    def _forget(self, key: t.Hashable, task: "asyncio.Task[T]") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # 所有等待者都已取消时, 避免 "exception was never retrieved" 警告
+        if not task.cancelled():
+            task.exception()
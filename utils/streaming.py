@@ -0,0 +1,23 @@
+import typing as t
+
+from piccolo.engine.postgres import PostgresEngine
+from piccolo.query.methods.select import Select
+
+
+async def iter_batches(
+    engine: PostgresEngine, query: Select, batch_size: int
+) -> t.AsyncIterator[list[t.Any]]:
+    """
+    通过服务端游标逐批读取查询结果, 内存占用只与 ``batch_size`` 有关.
+    游标需要在事务中使用: 整个导出期间占用一个连接, 并读取同一个快照.
+    调用方提前结束迭代 (如客户端断开) 时, 事务回滚并归还连接.
+
+    Yields:
+        list[asyncpg.Record]: 每批最多 ``batch_size`` 行
+    """
+    sql, args = query.querystrings[0].compile_string(engine_type="postgres")
+    async with engine.pool.acquire() as connection:
+        async with connection.transaction(readonly=True, isolation="repeatable_read"):
+            cursor = await connection.cursor(sql, *args)
+            while batch := await cursor.fetch(batch_size):
+                yield batch
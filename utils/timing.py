@@ -0,0 +1,27 @@
+import typing as t
+from contextlib import contextmanager
+from time import perf_counter
+
+
+class PhaseTimer:
+    """
+    记录启动过程中各阶段的耗时
+    """
+
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> t.Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = perf_counter() - start
+
+    def summary(self) -> str:
+        total = sum(self.phases.values())
+        parts = ", ".join(
+            f"{name}={seconds * 1000:.1f}ms" for name, seconds in self.phases.items()
+        )
+        return f"{parts} (total {total * 1000:.1f}ms)"
@@ -1,13 +1,10 @@
-import jwt
 import typing as t
-from datetime import datetime, timezone
 from app.settings import Settings, BASE_DIR, load_settings
-from pathlib import Path
-from app.settings import BASE_DIR
-from cryptography.hazmat.primitives.asymmetric import ed25519
-from cryptography.hazmat.primitives import serialization
-from msgspec import Struct, field, to_builtins, convert
+from msgspec import UNSET, DecodeError, Struct, field, structs
 from uuid_utils.compat import UUID, uuid7
+from utils.codecs import json_decoder
+from utils.jws import JWSHeader, JWTCodec, b64url_decode
+from utils.keyring import KeyRing
 from utils.logging import get_logger
 from time import time
 
@@ -32,6 +29,51 @@ class TokenPayload(Struct):
     jti: UUID = field(default_factory=lambda: uuid7())  # JWT ID (唯一标识符)
 
 
+def issued_at_ms(payload: TokenPayload) -> int:
+    """
+    token 的签发时间 (毫秒). ``iat`` 只精确到秒, 同一秒内修改密码后重新签发的 token
+    无法与旧 token 区分, 因此优先使用 UUIDv7 ``jti`` 中的毫秒时间戳
+    """
+    if payload.jti.version == 7:
+        return int.from_bytes(payload.jti.bytes[:6], "big")
+    return payload.iat * 1000
+
+
+class UnverifiedClaims(Struct):
+    """
+    未经签名验证的部分声明, 只能用作缓存键, 不能作为身份依据
+    """
+
+    sub: UUID
+    jti: UUID
+
+
+_UNVERIFIED_DECODER = json_decoder(UnverifiedClaims)
+_HEADER_DECODER = json_decoder(JWSHeader)
+
+# 本服务签发的 token 远小于该长度, 超长的直接拒绝
+MAX_TOKEN_LENGTH = 1024
+
+
+def peek_claims(token: str) -> t.Optional[UnverifiedClaims]:
+    """
+    不验证签名, 直接解析 payload 中的 sub 与 jti.
+    同时做廉价的结构检查 (长度, 段数, header 中的 alg), 不合格时返回 ``None``,
+    使明显无效的 token 不必进入签名验证
+    """
+    if len(token) > MAX_TOKEN_LENGTH:
+        return None
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    try:
+        if _HEADER_DECODER.decode(b64url_decode(parts[0].encode())).alg != "EdDSA":
+            return None
+        return _UNVERIFIED_DECODER.decode(b64url_decode(parts[1].encode()))
+    except (ValueError, DecodeError):
+        return None
+
+
 class JWTService:
     _instance: t.Self
     _initialized: bool = False
@@ -45,46 +87,12 @@ class JWTService:
         if JWTService._initialized:
             return
         JWTService._initialized = True
-        secret_dir = BASE_DIR.joinpath("secret")
-        self.private_key_path = secret_dir.joinpath("private.key")
-
-        if not secret_dir.exists():
-            secret_dir.mkdir(parents=True, exist_ok=True)
-            logger.info(f"Created secret directory at {secret_dir}")
-
-        if not self.private_key_path.exists():
-            logger.info("Generating new Ed25519 key pair")
-            self._generate_key_pair()
-        else:
-            logger.debug("Loading existing Ed25519 key pair")
-
         try:
-            self.private_key: ed25519.Ed25519PrivateKey = t.cast(
-                ed25519.Ed25519PrivateKey,
-                serialization.load_pem_private_key(
-                    data=self.private_key_path.read_bytes(),
-                    password=None,
-                ),
-            )
-            self.public_key = self.private_key.public_key()
+            self.keyring = KeyRing(BASE_DIR.joinpath("secret"))
         except Exception as e:
-            logger.error(f"Failed to load private key: {e}")
-            raise
-
-    def _generate_key_pair(self) -> None:
-        private_key = ed25519.Ed25519PrivateKey.generate()
-        try:
-            self.private_key_path.write_bytes(
-                private_key.private_bytes(
-                    encoding=serialization.Encoding.PEM,
-                    format=serialization.PrivateFormat.PKCS8,
-                    encryption_algorithm=serialization.NoEncryption(),
-                ),
-            )
-            logger.info(f"Private key saved to {self.private_key_path}")
-        except Exception as e:
-            logger.error(f"Failed to save private key: {e}")
+            logger.error(f"Failed to load key ring: {e}")
             raise
+        self.codec = JWTCodec(keyring=self.keyring, issuer=SETTINGS.jwt.issuer)
 
     # 生成JWT
     def generate_jwt(self, payload: TokenPayload) -> str:
@@ -94,12 +102,7 @@ class JWTService:
         :return: 生成的JWT字符串
         """
         try:
-            token = jwt.encode(
-                payload=to_builtins(payload),
-                key=self.private_key,
-                algorithm="EdDSA",
-                headers={"alg": "EdDSA", "typ": "JWT"},
-            )
+            token = self.codec.encode(payload)
             logger.debug(f"Generated JWT for subject: {payload.sub}")
             return token
 
@@ -114,23 +117,12 @@ class JWTService:
         :param token: JWT字符串
         :return: 解码后的JWT有效负载
         """
-        try:
-            payload: t.Dict[str, t.Any] = jwt.decode(
-                token,
-                key=self.public_key,
-                algorithms=["EdDSA"],
-                issuer=SETTINGS.jwt.issuer,
-                options={
-                    "verify_signature": True,
-                    "require": ["exp", "iss", "sub", "iss"],
-                },
-            )
-            return convert(payload, type=TokenPayload)
-        except jwt.ExpiredSignatureError:
-            raise ValueError("Token has expired.")
-        except jwt.InvalidIssuerError:
-            raise ValueError("Invalid issuer.")
-        except jwt.MissingRequiredClaimError:
-            raise ValueError("Missing required claim.")
-        except jwt.InvalidTokenError:
-            raise ValueError("Invalid token.")
+        claims = self.codec.decode(token)
+        # 缺失的可选声明 (iat/jti) 沿用 TokenPayload 的默认值, 与之前 convert 的行为一致
+        return TokenPayload(
+            **{
+                name: value
+                for name, value in structs.asdict(claims).items()
+                if value is not UNSET and name in TokenPayload.__struct_fields__
+            }
+        )